@@ -2,6 +2,8 @@ import csv
 import itertools
 import sys
 
+import pedigree
+
 PROBS = {
 
     # Unconditional probabilities for having gene
@@ -44,6 +46,31 @@ def main():
         sys.exit("Usage: python heredity.py data.csv")
     people = load_data(sys.argv[1])
 
+    # Exact gene and trait probabilities for each person, by belief
+    # propagation over the family tree
+    try:
+        probabilities = pedigree.infer(people, PROBS)
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+
+def enumerate_probabilities(people):
+    """
+    Returns the gene and trait probabilities for each person by summing
+    the joint probability of every assignment of genes and traits. Takes
+    time exponential in the number of people; pedigree.infer() gives the
+    same probabilities.
+    """
+
     # Keep track of gene and trait probabilities for each person
     probabilities = {
         person: {
@@ -83,15 +110,7 @@ def main():
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
-
-    # Print results
-    for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+    return probabilities
 
 
 def load_data(filename):
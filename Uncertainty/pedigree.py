@@ -0,0 +1,245 @@
+"""
+Exact inference of gene and trait probabilities over a family tree.
+
+The family is a Bayesian network: a person's number of gene copies (0, 1
+or 2) depends on their parents' numbers only, and their trait on their
+own number only. Known traits are evidence, folded into the factor of the
+person they belong to, so the network is left with one variable per
+person and one factor per person over them and their parents.
+
+The variables are eliminated one at a time in a greedy min-fill order.
+Each elimination forms a clique of the variable and its neighbors; the
+cliques, linked to the clique of the first of their neighbors eliminated
+after them, make a junction tree. Belief propagation along the tree, up
+to the roots and back down, gives every person's distribution given all
+the evidence in two passes. The work is linear in the number of people
+and exponential only in the size of the largest clique, which is 3 or 4
+for most families, including those with marriages between relatives.
+"""
+
+import heapq
+import itertools
+from operator import itemgetter
+
+GENES = (0, 1, 2)
+
+
+def projection(positions):
+    """
+    Returns a function taking a tuple to the tuple of its items at positions.
+    """
+    if len(positions) == 1:
+        position = positions[0]
+        return lambda values: (values[position],)
+    if not positions:
+        return lambda values: ()
+    return itemgetter(*positions)
+
+
+class Factor():
+    """
+    A function of some gene variables, as a table from their values
+    (a tuple, in the order of variables) to a number.
+    """
+
+    def __init__(self, variables, table=None):
+        self.variables = tuple(variables)
+        if table is None:
+            table = dict.fromkeys(itertools.product(GENES, repeat=len(self.variables)), 1.0)
+        self.table = table
+
+    def multiply(self, other):
+        """
+        Returns the product of self and other, over the variables of both.
+        """
+        variables = self.variables + tuple(v for v in other.variables if v not in self.variables)
+        theirs = projection([variables.index(v) for v in other.variables])
+        if len(variables) == len(self.variables):
+            # Most products are by a factor over some of our own variables
+            return Factor(variables, {values: p * other.table[theirs(values)]
+                                      for values, p in self.table.items()})
+        mine = projection([variables.index(v) for v in self.variables])
+        table = {}
+        for values in itertools.product(GENES, repeat=len(variables)):
+            table[values] = self.table[mine(values)] * other.table[theirs(values)]
+        return Factor(variables, table)
+
+    def marginal(self, variables):
+        """
+        Returns self with every variable but variables summed out,
+        scaled to sum to 1.
+        Raises ValueError if it is zero everywhere.
+        """
+        variables = tuple(variables)
+        kept = projection([self.variables.index(v) for v in variables])
+        table = dict.fromkeys(itertools.product(GENES, repeat=len(variables)), 0.0)
+        for values, p in self.table.items():
+            table[kept(values)] += p
+        total = sum(table.values())
+        if total <= 0:
+            raise ValueError("the known traits are impossible")
+        return Factor(variables, {values: p / total for values, p in table.items()})
+
+
+def passing(genes, probs):
+    """
+    Returns the probability that a parent with genes copies of the gene
+    passes it on.
+    """
+    if genes == 2:
+        return 1 - probs["mutation"]
+    if genes == 1:
+        return 0.5
+    return probs["mutation"]
+
+
+def inherit(genes, mother, father, probs):
+    """
+    Returns the probability that a child has genes copies of the gene,
+    given their parents' numbers of copies.
+    """
+    m, d = passing(mother, probs), passing(father, probs)
+    if genes == 2:
+        return m * d
+    if genes == 1:
+        return m * (1 - d) + (1 - m) * d
+    return (1 - m) * (1 - d)
+
+
+def person_factor(person, people, probs):
+    """
+    Returns the factor of a person over them and their parents: the
+    probability of their number of copies given their parents', times
+    the probability of their trait if it is known. A missing parent is
+    taken to have no copies.
+    """
+    mother, father = people[person]["mother"], people[person]["father"]
+    parents = [parent for parent in (mother, father) if parent is not None]
+    for parent in parents:
+        if parent not in people:
+            raise ValueError(f"{person}'s parent {parent} is not in the family")
+    trait = people[person]["trait"]
+
+    table = {}
+    for values in itertools.product(GENES, repeat=1 + len(parents)):
+        genes, known = values[0], dict(zip(parents, values[1:]))
+        if parents:
+            p = inherit(genes, known.get(mother, 0), known.get(father, 0), probs)
+        else:
+            p = probs["gene"][genes]
+        if trait is not None:
+            p *= probs["trait"][genes][trait]
+        table[values] = p
+    return Factor([person] + parents, table)
+
+
+def elimination_order(graph):
+    """
+    Eliminates the variables of the undirected graph (variable -> set of
+    neighbors) one at a time, always the one whose neighbors need the
+    fewest new edges between them, and returns the list of
+    (variable, neighbors) at the time each was eliminated.
+    The graph is consumed.
+    """
+    position = {v: i for i, v in enumerate(graph)}
+
+    def fill(v):
+        neighbors = list(graph[v])
+        return sum(1 for a, b in itertools.combinations(neighbors, 2) if b not in graph[a])
+
+    score = {v: (fill(v), len(graph[v]), position[v]) for v in graph}
+    heap = [(s, v) for v, s in score.items()]
+    heapq.heapify(heap)
+    order = []
+    while heap:
+        s, v = heapq.heappop(heap)
+        if v not in graph or score[v] != s: # Eliminated or rescored since it was pushed
+            continue
+        neighbors = graph.pop(v)
+        order.append((v, neighbors))
+        for a in neighbors:
+            graph[a].discard(v)
+            graph[a].update(neighbors - {a})
+
+        # Only the scores of the neighbors and their neighbors change
+        for u in set(neighbors).union(*(graph[a] for a in neighbors)):
+            score[u] = (fill(u), len(graph[u]), position[u])
+            heapq.heappush(heap, (score[u], u))
+    return order
+
+
+def infer(people, probs):
+    """
+    Returns the probability distributions of every person's gene and trait
+    given the known traits, as {person: {"gene": {2: p, 1: p, 0: p},
+    "trait": {True: p, False: p}}}.
+    Raises ValueError if the known traits are impossible.
+    """
+    factors = [person_factor(person, people, probs) for person in people]
+
+    # Moral graph: the variables of every factor are linked to each other
+    graph = {person: set() for person in people}
+    for factor in factors:
+        for a, b in itertools.combinations(factor.variables, 2):
+            graph[a].add(b)
+            graph[b].add(a)
+
+    # Junction tree: clique i is the variable eliminated i-th and its
+    # neighbors, and sends its message over the neighbors to the clique of
+    # the first of them eliminated after it (or is a root if it has none)
+    order = elimination_order(graph)
+    eliminated = {v: i for i, (v, _) in enumerate(order)}
+    cliques = [(v,) + tuple(sorted(neighbors, key=eliminated.get)) for v, neighbors in order]
+    separators = [clique[1:] for clique in cliques]
+    parent = [eliminated[clique[1]] if len(clique) > 1 else None for clique in cliques]
+    children = [[] for _ in cliques]
+    for i, p in enumerate(parent):
+        if p is not None:
+            children[p].append(i)
+
+    # Every factor goes to the clique of its first eliminated variable,
+    # which holds all its variables
+    potentials = [Factor(clique) for clique in cliques]
+    for factor in factors:
+        i = min(eliminated[v] for v in factor.variables)
+        potentials[i] = potentials[i].multiply(factor)
+
+    # Upward pass: children are always eliminated before their parent
+    up = [None] * len(cliques)
+    for i in range(len(cliques)):
+        belief = potentials[i]
+        for child in children[i]:
+            belief = belief.multiply(up[child])
+        if parent[i] is not None:
+            up[i] = belief.marginal(separators[i])
+
+    # Downward pass: a clique sends each child everything it has heard
+    # except that child's own message, from products of the messages
+    # before and after it
+    down = [None] * len(cliques)
+    beliefs = [None] * len(cliques)
+    for i in reversed(range(len(cliques))):
+        base = potentials[i] if down[i] is None else potentials[i].multiply(down[i])
+        messages = [up[child] for child in children[i]]
+        before = [base]
+        for message in messages:
+            before.append(before[-1].multiply(message))
+        after = [None] * (len(messages) + 1)
+        for k in reversed(range(len(messages))):
+            after[k] = messages[k] if after[k + 1] is None else messages[k].multiply(after[k + 1])
+        for k, child in enumerate(children[i]):
+            belief = before[k] if after[k + 1] is None else before[k].multiply(after[k + 1])
+            down[child] = belief.marginal(separators[child])
+        beliefs[i] = before[-1]
+
+    probabilities = {}
+    for person in people:
+        genes = beliefs[eliminated[person]].marginal([person]).table
+        gene = {g: genes[(g,)] for g in (2, 1, 0)}
+        trait = people[person]["trait"]
+        if trait is None:
+            has_trait = sum(gene[g] * probs["trait"][g][True] for g in GENES)
+        else:
+            has_trait = 1.0 if trait else 0.0
+        probabilities[person] = {"gene": gene, "trait": {True: has_trait, False: 1 - has_trait}}
+    return probabilities
@@ -0,0 +1,263 @@
+"""
+Global linear solver for the Minesweeper AI.
+
+Every revealed number is an equation over the unknown cells around it:
+the cells (0 or 1 for safe or mine) sum to the number of mines. The
+equations are kept in reduced row echelon form with exact Fraction
+coefficients, and updated in place as equations are added and cells
+become known, instead of being rebuilt on every move.
+
+Cells are deduced from the reduced rows in two ways:
+    - bounds: an equation whose right hand side equals the least or the
+      greatest value its left hand side can take fixes all its cells
+      (this finds e.g. the 1-2-1 patterns the subset rule misses)
+    - probing: a cell is tried as safe and as a mine, propagating bounds
+      through the equations and branching DEPTH levels deep; a value
+      that leads to a contradiction everywhere fixes the cell to the other
+      value. The search is bounded by a node budget per cell, and is
+      inconclusive if it runs out.
+Only cells of equations changed since the last deduction are probed.
+"""
+
+import math
+from fractions import Fraction
+
+# Branching depth and number of equation checks allowed when probing a cell
+DEPTH = 1
+BUDGET = 200
+
+
+class LinearSystem():
+    """
+    The equations about the unknown cells, in reduced row echelon form.
+    Every row has a pivot cell with coefficient 1 that appears in no other
+    row: pivot + sum(coefficient * cell) = rhs.
+    """
+
+    def __init__(self, depth=DEPTH, budget=BUDGET):
+        self.depth = depth
+        self.budget = budget
+
+        # pivot -> {cell: coefficient} of the other cells of its row, and its rhs
+        self.rows = {}
+        self.rhs = {}
+
+        # Non-pivot cell -> pivots of the rows containing it
+        self.columns = {}
+
+        # Cells known to be safe (0) or mines (1)
+        self.known = {}
+
+        # Pivots of the rows changed since the last deduction
+        self.changed = set()
+
+        # pivot -> its row scaled to integer coefficients, for check()
+        self.integer = {}
+
+    def add_equation(self, cells, count):
+        """
+        Adds the equation: count of the cells are mines.
+        Raises ValueError if it contradicts the system.
+        """
+        coefficients = {}
+        rhs = Fraction(count)
+        for cell in cells:
+            if cell in self.known:
+                rhs -= self.known[cell]
+            else:
+                coefficients[cell] = Fraction(1)
+        self.insert(coefficients, rhs)
+
+    def assign(self, cell, value):
+        """
+        Records that cell is safe (0) or a mine (1) and removes it from
+        every equation.
+        """
+        if cell in self.known:
+            return
+        self.known[cell] = value
+        if cell in self.rows:
+            # pivot + row = rhs becomes row = rhs - value, a new equation
+            row = self.rows.pop(cell)
+            rhs = self.rhs.pop(cell)
+            self.changed.discard(cell)
+            self.integer.pop(cell, None)
+            for other in row:
+                self.columns[other].discard(cell)
+                if not self.columns[other]:
+                    del self.columns[other]
+            self.insert(row, rhs - value)
+        else:
+            for pivot in self.columns.pop(cell, ()):
+                self.rhs[pivot] -= self.rows[pivot].pop(cell) * value
+                self.touch(pivot)
+
+    def insert(self, coefficients, rhs):
+        """
+        Reduces the equation sum(coefficient * cell) = rhs by the rows and
+        adds it to the system as a new row, if anything is left of it.
+        """
+        # Substitute the pivots of existing rows
+        for pivot in [cell for cell in coefficients if cell in self.rows]:
+            factor = coefficients.pop(pivot)
+            rhs -= factor * self.rhs[pivot]
+            for cell, coefficient in self.rows[pivot].items():
+                value = coefficients.get(cell, 0) - factor * coefficient
+                if value:
+                    coefficients[cell] = value
+                else:
+                    coefficients.pop(cell, None)
+
+        if not coefficients:
+            if rhs != 0:
+                raise ValueError("the equations contradict each other")
+            return
+
+        # Make the first cell the pivot, and remove it from the other rows
+        pivot = min(coefficients)
+        factor = coefficients.pop(pivot)
+        row = {cell: coefficient / factor for cell, coefficient in coefficients.items()}
+        rhs /= factor
+        for other in self.columns.pop(pivot, ()):
+            other_row = self.rows[other]
+            scale = other_row.pop(pivot)
+            self.rhs[other] -= scale * rhs
+            for cell, coefficient in row.items():
+                value = other_row.get(cell, 0) - scale * coefficient
+                if value:
+                    if cell not in other_row:
+                        self.columns.setdefault(cell, set()).add(other)
+                    other_row[cell] = value
+                elif cell in other_row:
+                    del other_row[cell]
+                    self.columns[cell].discard(other)
+                    if not self.columns[cell]:
+                        del self.columns[cell]
+            self.touch(other)
+
+        self.rows[pivot] = row
+        self.rhs[pivot] = rhs
+        for cell in row:
+            self.columns.setdefault(cell, set()).add(pivot)
+        self.touch(pivot)
+
+    def touch(self, pivot):
+        """
+        Records that the row of pivot changed.
+        """
+        self.changed.add(pivot)
+        self.integer.pop(pivot, None)
+
+    def scaled(self, pivot):
+        """
+        Returns the row of pivot multiplied to integers, as a list of
+        (cell, coefficient) with the pivot first, and its rhs.
+        """
+        if pivot not in self.integer:
+            row, rhs = self.rows[pivot], self.rhs[pivot]
+            scale = math.lcm(rhs.denominator, *(coefficient.denominator for coefficient in row.values()))
+            terms = [(pivot, scale)] + [(cell, int(coefficient * scale)) for cell, coefficient in row.items()]
+            self.integer[pivot] = (terms, int(rhs * scale))
+        return self.integer[pivot]
+
+    def equations(self, cell):
+        """
+        Returns the pivots of the rows containing cell.
+        """
+        pivots = set(self.columns.get(cell, ()))
+        if cell in self.rows:
+            pivots.add(cell)
+        return pivots
+
+    def check(self, pivot, assignment):
+        """
+        Returns None if the row of pivot can not hold under the partial
+        assignment (cell -> 0 or 1), otherwise a dict of the values it
+        forces on its unassigned cells.
+        """
+        terms, rhs = self.scaled(pivot)
+        low = high = 0
+        free = []
+        for cell, coefficient in terms:
+            if cell in assignment:
+                rhs -= coefficient * assignment[cell]
+            else:
+                free.append((cell, coefficient))
+                if coefficient > 0:
+                    high += coefficient
+                else:
+                    low += coefficient
+        if rhs < low or rhs > high:
+            return None
+        if rhs == low and rhs == high:
+            return {}
+        if rhs == low:
+            return {cell: 0 if coefficient > 0 else 1 for cell, coefficient in free}
+        if rhs == high:
+            return {cell: 1 if coefficient > 0 else 0 for cell, coefficient in free}
+        return {}
+
+    def propagate(self, assignment, cells, budget):
+        """
+        Extends assignment with the values forced through the rows of
+        cells, and returns False on a contradiction. budget is a one
+        element list of checks left, shared by a whole probe.
+        """
+        queue = list(cells)
+        while queue:
+            for pivot in self.equations(queue.pop()):
+                if budget[0] <= 0:
+                    return True
+                budget[0] -= 1
+                forced = self.check(pivot, assignment)
+                if forced is None:
+                    return False
+                for cell, value in forced.items():
+                    if cell not in assignment:
+                        assignment[cell] = value
+                        queue.append(cell)
+                    elif assignment[cell] != value:
+                        return False
+        return True
+
+    def consistent(self, assignment, cells, depth, budget):
+        """
+        Returns False if assignment can be shown to contradict the rows,
+        branching on unassigned cells of the rows of cells depth levels deep.
+        """
+        assignment = dict(assignment)
+        if not self.propagate(assignment, cells, budget):
+            return False
+        if depth == 0 or budget[0] <= 0:
+            return True
+        for pivot in sorted(set().union(*(self.equations(cell) for cell in assignment))):
+            for cell in [pivot] + sorted(self.rows[pivot]):
+                if cell not in assignment:
+                    return any(self.consistent({**assignment, cell: value}, [cell], depth - 1, budget)
+                               for value in (0, 1))
+        return True
+
+    def deduce(self):
+        """
+        Returns the sets of cells (mines, safes) that the equations show
+        to be mines or safe. Only the rows changed since the last call are
+        looked at. The cells are not assigned.
+        """
+        mines, safes = set(), set()
+        changed = sorted(pivot for pivot in self.changed if pivot in self.rows)
+        self.changed = set()
+
+        # Bounds of every changed row on its own
+        for pivot in changed:
+            for cell, value in (self.check(pivot, {}) or {}).items():
+                (mines if value else safes).add(cell)
+
+        # Probe the other cells of the changed rows
+        cells = sorted({cell for pivot in changed for cell in [pivot, *self.rows[pivot]]}
+                       - mines - safes)
+        for cell in cells:
+            for value in (0, 1):
+                if not self.consistent({cell: value}, [cell], self.depth, [self.budget]):
+                    (safes if value else mines).add(cell)
+                    break
+        return mines, safes
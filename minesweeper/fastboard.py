@@ -0,0 +1,129 @@
+"""
+NumPy-backed Minesweeper board for large games.
+
+ArrayMinesweeper can be used in place of Minesweeper. The mines are kept
+in a boolean array and the number of nearby mines of every cell is
+computed once, when the board is made, by summing the eight shifted
+copies of the padded mine array (a 3x3 convolution without its center).
+Lookups are then array reads, and reveal() opens a whole region of cells
+without nearby mines with a breadth first search run on all cells of a
+layer at once.
+"""
+
+import numpy as np
+
+
+def neighbor_counts(board):
+    """
+    Returns an array with the number of mines around every cell of the
+    boolean mine array board, not including the cell itself.
+    """
+    height, width = board.shape
+    padded = np.zeros((height + 2, width + 2), dtype=np.uint8)
+    padded[1:-1, 1:-1] = board
+    counts = np.zeros((height, width), dtype=np.uint8)
+    for di in range(3):
+        for dj in range(3):
+            if (di, dj) != (1, 1):
+                counts += padded[di:di + height, dj:dj + width]
+    return counts
+
+
+class ArrayMinesweeper():
+    """
+    Minesweeper game representation backed by NumPy arrays
+    """
+
+    def __init__(self, height=8, width=8, mines=8, seed=None):
+
+        # Set initial width and height
+        self.height = height
+        self.width = width
+
+        # Place the mines on distinct random cells
+        rng = np.random.default_rng(seed)
+        board = np.zeros(height * width, dtype=bool)
+        board[rng.choice(height * width, size=mines, replace=False)] = True
+        self.board = board.reshape(height, width)
+        self.counts = neighbor_counts(self.board)
+
+        # Cells without nearby mines, on a grid padded with a border of
+        # False so that a flat index plus an offset is always in range
+        self.stride = width + 2
+        self.openable = np.zeros((height + 2, width + 2), dtype=bool)
+        self.openable[1:-1, 1:-1] = (self.counts == 0) & ~self.board
+        self.inside = np.zeros((height + 2, width + 2), dtype=bool)
+        self.inside[1:-1, 1:-1] = True
+        s = self.stride
+        self.offsets = np.array([-s - 1, -s, -s + 1, -1, 1, s - 1, s, s + 1])
+
+        # At first, player has found no mines
+        self.mines_found = set()
+        self.mine_set = None
+
+    @property
+    def mines(self):
+        """
+        Returns the set of all mine cells, built the first time it is needed.
+        """
+        if self.mine_set is None:
+            self.mine_set = set(map(tuple, np.argwhere(self.board).tolist()))
+        return self.mine_set
+
+    def print(self):
+        """
+        Prints a text-based representation
+        of where mines are located.
+        """
+        for row in self.board:
+            print("--" * self.width + "-")
+            print("".join("|X" if mine else "| " for mine in row) + "|")
+        print("--" * self.width + "-")
+
+    def is_mine(self, cell):
+        return bool(self.board[cell])
+
+    def nearby_mines(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+        return int(self.counts[cell])
+
+    def reveal(self, cell):
+        """
+        Returns an array of the (i, j) cells uncovered by clicking the safe
+        cell: the cell itself and, if it has no nearby mines, every cell of
+        its connected region without nearby mines and the cells around it.
+        """
+        if self.board[cell]:
+            raise ValueError(f"{cell} is a mine")
+        i, j = cell
+        if self.counts[i, j] != 0:
+            return np.array([[i, j]])
+
+        # Breadth first search over flat indices of the padded grid, one
+        # layer of the region at a time
+        openable = self.openable.ravel()
+        inside = self.inside.ravel()
+        seen = np.zeros(openable.size, dtype=bool)
+        slot = np.zeros(openable.size, dtype=np.int64) # Drops repeated cells without sorting
+        frontier = np.array([(i + 1) * self.stride + j + 1])
+        seen[frontier] = True
+        while frontier.size:
+            around = (frontier[:, None] + self.offsets).ravel()
+            around = around[inside[around] & ~seen[around]]
+            positions = np.arange(around.size)
+            slot[around] = positions
+            around = around[slot[around] == positions]
+            seen[around] = True
+            frontier = around[openable[around]]
+        found = np.flatnonzero(seen)
+        return np.stack([found // self.stride - 1, found % self.stride - 1], axis=1)
+
+    def won(self):
+        """
+        Checks if all mines have been flagged.
+        """
+        return self.mines_found == self.mines
@@ -0,0 +1,140 @@
+"""
+No-guess Minesweeper board generation.
+
+A board is no-guess if, starting from a given first click, MinesweeperAI
+can reveal every safe cell by making known safe moves only. Boards are
+drawn with seeds from a seeded generator and redrawn until one is
+no-guess; the first click and its neighbors never hold mines. Many boards
+are generated in parallel, one task per board, each with its own seed.
+
+Every board is written as one JSON line holding the seed it was drawn
+with, which rebuilds it with Minesweeper(height, width, mines, seed,
+safe=around(start)), and its mines.
+
+Usage: python generate.py [-n BOARDS] [--height H] [--width W]
+                          [--mines M] [--start I,J] [--seed SEED]
+                          [-w WORKERS] [--attempts N] [--solver]
+                          [-o boards.jsonl]
+"""
+
+import argparse
+import json
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+# Boards drawn per generated board before giving up
+ATTEMPTS = 1000
+
+
+def around(cell, height, width):
+    """
+    Returns the cell and its neighbors on the board.
+    """
+    i, j = cell
+    return {(a, b) for a in range(i - 1, i + 2) for b in range(j - 1, j + 2)
+            if 0 <= a < height and 0 <= b < width}
+
+
+def no_guess(game, start, solver=False):
+    """
+    Returns whether every safe cell of game can be revealed from start
+    without guessing.
+    """
+    ai = MinesweeperAI(height=game.height, width=game.width, mines=len(game.mines), solver=solver)
+    move = start
+    while move is not None:
+        ai.add_knowledge(move, game.nearby_mines(move))
+        move = ai.make_safe_move()
+    return len(ai.moves_made) + len(game.mines) == game.height * game.width
+
+
+def generate(height, width, mines, seed=None, start=None, attempts=ATTEMPTS, solver=False):
+    """
+    Returns a no-guess game and the seed it was drawn with, or None if
+    none was found in attempts tries. start defaults to the center cell.
+    """
+    start = start or (height // 2, width // 2)
+    safe = around(start, height, width)
+    rng = random.Random(seed)
+    for _ in range(attempts):
+        board_seed = rng.randrange(2 ** 32)
+        game = Minesweeper(height=height, width=width, mines=mines, seed=board_seed, safe=safe)
+        if no_guess(game, start, solver):
+            return game, board_seed
+    return None
+
+
+def generate_board(height, width, mines, seed, start, attempts, solver):
+    """
+    Returns the JSON record of a no-guess board, or None if none was found.
+    Runs in a worker process.
+    """
+    found = generate(height, width, mines, seed, start, attempts, solver)
+    if found is None:
+        return None
+    game, board_seed = found
+    return {"height": height, "width": width, "start": list(start), "seed": board_seed,
+            "mines": sorted([i, j] for i, j in game.mines)}
+
+
+def generate_many(count, height, width, mines, seed=0, start=None, workers=None,
+                  attempts=ATTEMPTS, solver=False):
+    """
+    Yields the records of count no-guess boards, board i generated with
+    seed + i, in order. Boards that were not found are skipped.
+    """
+    start = start or (height // 2, width // 2)
+    if not (0 <= start[0] < height and 0 <= start[1] < width):
+        raise ValueError(f"start {start} is not on the board")
+    if not 0 <= mines <= height * width - len(around(start, height, width)):
+        raise ValueError(f"{mines} mines do not fit around the start")
+    seeds = [seed + i for i in range(count)]
+    args = ([height] * count, [width] * count, [mines] * count, seeds,
+            [start] * count, [attempts] * count, [solver] * count)
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            records = executor.map(generate_board, *args)
+            yield from (record for record in records if record is not None)
+    else:
+        records = map(generate_board, *args)
+        yield from (record for record in records if record is not None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate no-guess Minesweeper boards.")
+    parser.add_argument("-n", "--boards", type=int, default=10, help="number of boards")
+    parser.add_argument("--height", type=int, default=16, help="board height")
+    parser.add_argument("--width", type=int, default=16, help="board width")
+    parser.add_argument("--mines", type=int, default=40, help="number of mines")
+    parser.add_argument("--start", default=None, help="first click as I,J (default the center)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first board")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--attempts", type=int, default=ATTEMPTS, help="boards drawn per board before giving up")
+    parser.add_argument("--solver", action="store_true", help="let the AI use the global linear solver too")
+    parser.add_argument("-o", "--output", default="-", help="output file, - for stdout")
+    args = parser.parse_args()
+
+    outfile = sys.stdout if args.output == "-" else open(args.output, "w")
+    found = 0
+    try:
+        start = tuple(int(n) for n in args.start.split(",")) if args.start else None
+        if start is not None and len(start) != 2:
+            raise ValueError(f"invalid start {args.start!r}")
+        for record in generate_many(args.boards, args.height, args.width, args.mines, args.seed,
+                                    start, args.workers, args.attempts, args.solver):
+            outfile.write(json.dumps(record) + "\n")
+            found += 1
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+    finally:
+        if outfile is not sys.stdout:
+            outfile.close()
+    if found < args.boards:
+        print(f"Only {found} of {args.boards} boards found", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,22 @@
 import itertools
 import random
 import copy
+from collections import deque
+
+import elimination
+import probability
+
+
+def sample(rng, n, k):
+    """
+    Returns a set of k distinct numbers from range(n), chosen uniformly
+    with k calls to rng.randrange() (Floyd's algorithm).
+    """
+    chosen = set()
+    for j in range(n - k, n):
+        t = rng.randrange(j + 1)
+        chosen.add(j if t in chosen else t)
+    return chosen
 
 
 class Minesweeper():
@@ -8,32 +24,43 @@ class Minesweeper():
     Minesweeper game representation
     """
 
-    def __init__(self, height=8, width=8, mines=8):
+    def __init__(self, height=8, width=8, mines=8, seed=None, safe=()):
 
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
 
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
+        # Cells that must not be mines, e.g. the first click and its neighbors
+        excluded = sorted(set(i * width + j for i, j in safe))
+        if not 0 <= mines <= height * width - len(excluded):
+            raise ValueError(f"{mines} mines do not fit on the board")
 
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Add mines randomly, the same ones every time for a given seed
+        rng = random if seed is None else random.Random(seed)
+        self.mines = set()
+        for index in sample(rng, height * width - len(excluded), mines):
+            # Skip over the excluded cells
+            for skipped in excluded:
+                if skipped > index:
+                    break
+                index += 1
+            self.mines.add(divmod(index, width))
+
+        # The field as nested lists, built only if something asks for it
+        self.grid = None
 
         # At first, player has found no mines
         self.mines_found = set()
 
+    @property
+    def board(self):
+        """
+        Returns the field as a list of rows of booleans, True for a mine.
+        """
+        if self.grid is None:
+            self.grid = [[(i, j) in self.mines for j in range(self.width)] for i in range(self.height)]
+        return self.grid
+
     def print(self):
         """
         Prints a text-based representation
@@ -42,7 +69,7 @@ class Minesweeper():
         for i in range(self.height):
             print("--" * self.width + "-")
             for j in range(self.width):
-                if self.board[i][j]:
+                if (i, j) in self.mines:
                     print("|X", end="")
                 else:
                     print("| ", end="")
@@ -50,8 +77,7 @@ class Minesweeper():
         print("--" * self.width + "-")
 
     def is_mine(self, cell):
-        i, j = cell
-        return self.board[i][j]
+        return cell in self.mines
 
     def nearby_mines(self, cell):
         """
@@ -71,10 +97,9 @@ class Minesweeper():
                 if (i, j) == cell:
                     continue
 
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
+                # Update count if cell is mine; cells off the board never are
+                if (i, j) in self.mines:
+                    count += 1
 
         return count
 
@@ -95,10 +120,17 @@ class Sentence():
     def __init__(self, cells, count):
         self.cells = set(cells)
         self.count = count
+        self.hash_value = None
 
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
+    def __hash__(self):
+        # Hashed by content, so a sentence must not change while it is in a set
+        if self.hash_value is None:
+            self.hash_value = hash((frozenset(self.cells), self.count))
+        return self.hash_value
+
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
@@ -125,6 +157,7 @@ class Sentence():
         if cell in self.cells:
             self.cells.remove(cell)
             self.count -= 1
+            self.hash_value = None
 
     def mark_safe(self, cell):
         """
@@ -134,6 +167,216 @@ class Sentence():
         # {A,B,C} = 2 and C is safe -> {A,B} = 2
         if cell in self.cells:
             self.cells.remove(cell)
+            self.hash_value = None
+
+    def __len__(self):
+        return len(self.cells)
+
+    def issubset(self, other):
+        """
+        Returns whether every cell of self is in other.
+        """
+        return self.cells <= other.cells
+
+    def difference(self, other):
+        """
+        Returns the sentence about the cells of self not in other,
+        where other is a subset of self.
+        """
+        return Sentence(self.cells - other.cells, self.count - other.count)
+
+
+# Cell tuples decoded by BitSentence, shared between sentences: width -> board index -> cell
+decoded_cells = {}
+
+
+class BitSentence():
+    """
+    Sentence with its cells encoded as the bits of an integer. Cell (i, j)
+    has board index i * width + j and is bit index - base of mask, where
+    base is the index of the first cell, so masks stay about two rows
+    long. Subset tests, differences and removing a cell are a few integer
+    operations.
+    """
+
+    __slots__ = ("base", "mask", "count", "width", "decoded")
+
+    def __init__(self, cells, count, width):
+        indexes = [i * width + j for i, j in cells]
+        self.base = min(indexes, default=0)
+        self.mask = 0
+        for index in indexes:
+            self.mask |= 1 << (index - self.base)
+        self.count = count
+        self.width = width
+        self.decoded = None
+
+    def normalize(self):
+        """
+        Moves base to the first cell left in the sentence, after the mask
+        changed.
+        """
+        self.decoded = None
+        if self.mask:
+            shift = (self.mask & -self.mask).bit_length() - 1
+            self.mask >>= shift
+            self.base += shift
+        else:
+            self.base = 0
+
+    @property
+    def cells(self):
+        """
+        Returns a tuple of the cells in the sentence, decoded the first
+        time it is needed after a change.
+        """
+        if self.decoded is None:
+            known = decoded_cells.setdefault(self.width, {})
+            cells = []
+            mask = self.mask
+            while mask:
+                low = mask & -mask
+                index = self.base + low.bit_length() - 1
+                cell = known.get(index)
+                if cell is None:
+                    cell = known[index] = divmod(index, self.width)
+                cells.append(cell)
+                mask ^= low
+            self.decoded = tuple(cells)
+        return self.decoded
+
+    def __eq__(self, other):
+        return self.base == other.base and self.mask == other.mask and self.count == other.count
+
+    def __hash__(self):
+        # Hashed by content, so a sentence must not change while it is in a set
+        return hash((self.base, self.mask, self.count))
+
+    def __str__(self):
+        return f"{set(self.cells)} = {self.count}"
+
+    def __len__(self):
+        return self.mask.bit_count()
+
+    def known_mines(self):
+        """
+        Returns the cells in the sentence known to be mines.
+        """
+        if(self.mask.bit_count() == self.count):
+            return self.cells
+
+    def known_safes(self):
+        """
+        Returns the cells in the sentence known to be safe.
+        """
+        if(self.count == 0):
+            return self.cells
+
+    def mark_mine(self, cell):
+        """
+        Updates internal knowledge representation given the fact that
+        a cell is known to be a mine.
+        """
+        bit = cell[0] * self.width + cell[1] - self.base
+        if bit >= 0 and self.mask >> bit & 1:
+            self.mask ^= 1 << bit
+            self.count -= 1
+            self.normalize()
+
+    def mark_safe(self, cell):
+        """
+        Updates internal knowledge representation given the fact that
+        a cell is known to be safe.
+        """
+        bit = cell[0] * self.width + cell[1] - self.base
+        if bit >= 0 and self.mask >> bit & 1:
+            self.mask ^= 1 << bit
+            self.normalize()
+
+    def issubset(self, other):
+        """
+        Returns whether every cell of self is in other.
+        """
+        shift = self.base - other.base
+        if shift < 0:
+            return self.mask == 0
+        return (self.mask << shift) & ~other.mask == 0
+
+    def difference(self, other):
+        """
+        Returns the sentence about the cells of self not in other,
+        where other is a subset of self.
+        """
+        sentence = BitSentence((), self.count - other.count, self.width)
+        sentence.base = self.base
+        sentence.mask = self.mask & ~(other.mask << (other.base - self.base))
+        sentence.normalize()
+        return sentence
+
+
+class CellPool():
+    """
+    A set of cells of a height x width board with O(1) add, discard and
+    random choice. The board indexes i * width + j are kept in an array
+    of slots, the cells of the pool in the first size slots; a cell is
+    added or discarded by swapping it with the slot at the boundary.
+    Every index starts in its own slot, and only the slots holding another
+    index are stored, so a pool starting full costs nothing up front.
+    """
+
+    def __init__(self, height, width, full=False):
+        self.width = width
+        self.size = height * width if full else 0
+
+        # slot -> index and index -> slot, where they differ from the start
+        self.cells = {}
+        self.slots = {}
+
+    def slot(self, cell):
+        """
+        Returns the slot of cell.
+        """
+        index = cell[0] * self.width + cell[1]
+        return self.slots.get(index, index)
+
+    def swap(self, a, b):
+        """
+        Swaps the indexes in slots a and b.
+        """
+        x, y = self.cells.get(a, a), self.cells.get(b, b)
+        self.cells[a], self.slots[y] = y, a
+        self.cells[b], self.slots[x] = x, b
+
+    def add(self, cell):
+        slot = self.slot(cell)
+        if slot >= self.size:
+            self.swap(slot, self.size)
+            self.size += 1
+
+    def discard(self, cell):
+        slot = self.slot(cell)
+        if slot < self.size:
+            self.size -= 1
+            self.swap(slot, self.size)
+
+    def choice(self):
+        """
+        Returns a random cell of the pool, or None if it is empty.
+        """
+        if not self.size:
+            return None
+        slot = random.randrange(self.size)
+        return divmod(self.cells.get(slot, slot), self.width)
+
+    def __contains__(self, cell):
+        return self.slot(cell) < self.size
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for slot in range(self.size):
+            yield divmod(self.cells.get(slot, slot), self.width)
 
 
 class MinesweeperAI():
@@ -141,12 +384,21 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None, bitsets=False, solver=False):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Whether sentences are kept as BitSentence instead of Sentence
+        self.bitsets = bitsets
+
+        # Optional global solver, deducing what sentences taken two at a time can not
+        self.system = elimination.LinearSystem() if solver else None
+
+        # Number of mines on the board, if known
+        self.total_mines = mines
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -154,14 +406,48 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # Set of all possible moves, used by make random move
-        self.allMoves = set()
-        for h in range(self.height):
-            for w in range(self.width):
-                self.allMoves.add((h, w))
+        # Cells left to choose from for a safe move (known safe, not made yet)
+        # and for a random move (not made yet, not known to be a mine)
+        self.safe_moves = CellPool(height, width)
+        self.random_moves = CellPool(height, width, full=True)
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Set of sentences about the game known to be true,
+        # and for every cell the sentences that contain it
+        self.knowledge = set()
+        self.index = {}
+
+        # Sentences added or changed whose consequences have not been drawn yet,
+        # apart from those that are all mines or all safe, which are resolvable
+        self.pending = deque()
+        self.resolvable = deque()
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base and queues it for inference,
+        unless it has no cells or is already known.
+        """
+        size = len(sentence)
+        if not size or sentence in self.knowledge:
+            return
+        self.knowledge.add(sentence)
+        for cell in sentence.cells:
+            self.index.setdefault(cell, set()).add(sentence)
+        if sentence.count == 0 or sentence.count == size:
+            self.resolvable.append(sentence)
+        else:
+            self.pending.append(sentence)
+
+    def remove_sentence(self, sentence):
+        """
+        Removes a sentence from the knowledge base.
+        """
+        self.knowledge.discard(sentence)
+        for cell in sentence.cells:
+            sentences = self.index.get(cell)
+            if sentences is not None:
+                sentences.discard(sentence)
+                if not sentences:
+                    del self.index[cell]
 
     def mark_mine(self, cell):
         """
@@ -169,8 +455,15 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
+        self.random_moves.discard(cell)
+        if self.system is not None:
+            self.system.assign(cell, 1)
+        # No sentence contains the cell afterwards, so its index entry goes
+        for sentence in self.index.pop(cell, ()):
+            # Sentences are hashed by content, so take it out while it changes
+            self.remove_sentence(sentence)
             sentence.mark_mine(cell)
+            self.add_sentence(sentence)
 
     def mark_safe(self, cell):
         """
@@ -178,8 +471,14 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        if cell not in self.moves_made:
+            self.safe_moves.add(cell)
+        if self.system is not None:
+            self.system.assign(cell, 0)
+        for sentence in self.index.pop(cell, ()):
+            self.remove_sentence(sentence)
             sentence.mark_safe(cell)
+            self.add_sentence(sentence)
 
     def add_knowledge(self, cell, count):
         """
@@ -198,6 +497,8 @@ class MinesweeperAI():
         """
         # (1) Mark the cell as a move that has been made
         self.moves_made.add(cell)
+        self.safe_moves.discard(cell)
+        self.random_moves.discard(cell)
 
         # (2) Mark the cell as safe
         self.mark_safe(cell)
@@ -205,31 +506,65 @@ class MinesweeperAI():
         # (3) Add a new sentence based on the value of cell and count
         Neighbors = self.neighbors(cell)
         # Remove known mines
-        for n in Neighbors.intersection(self.mines):
-            Neighbors.remove(n)
-            count -= 1
-        newSentence = Sentence(cells=Neighbors, count=count)
-        self.knowledge.append(newSentence)
-
-        # (4) Traverse knowledge base and mark cells and safe/mine if possible
-        for sentence in self.knowledge.copy():
-            m, s = sentence.known_mines(), sentence.known_safes()
-            if m:
-                for mine in m.copy():
-                    self.mark_mine(mine)
-                self.knowledge.remove(sentence)
-            if s:
-                for safe in s.copy():
-                    self.mark_safe(safe)
-                self.knowledge.remove(sentence)        
-
-        # (5) {A,B,C} = 1 and {A,B,C,D,E} = 2 -> {D,E} = 1
-        cknowledge = self.knowledge.copy()
-        for sentence1 in cknowledge:
-            for sentence2 in cknowledge:
-                if(sentence1 != sentence2 and cell in sentence1.cells and cell in sentence2.cells and sentence1.cells.issubset(sentence2.cells)):
-                    newSen = Sentence(sentence2.cells - sentence1.cells, sentence2.count-sentence1.count)
-                    self.knowledge.append(newSen)
+        mines = Neighbors.intersection(self.mines)
+        if self.system is not None:
+            self.system.add_equation(Neighbors - mines, count - len(mines))
+        if self.bitsets:
+            self.add_sentence(BitSentence(Neighbors - mines, count - len(mines), self.width))
+        else:
+            self.add_sentence(Sentence(cells=Neighbors - mines, count=count - len(mines)))
+
+        # (4) and (5) Draw conclusions until nothing new follows
+        self.infer()
+        while self.system is not None:
+            mines, safes = self.system.deduce()
+            if not mines and not safes:
+                break
+            for mine in mines:
+                self.mark_mine(mine)
+            for safe in safes:
+                self.mark_safe(safe)
+            self.infer()
+
+    def infer(self):
+        """
+        Draws every conclusion of the queued sentences, until none is left:
+        the cells of a sentence that are all mines or all safe are marked,
+        and {A,B,C} = 1 and {A,B,C,D,E} = 2 -> {D,E} = 1 for every pair of
+        sentences sharing a cell where one is a subset of the other.
+        New and changed sentences are queued in turn.
+
+        Resolvable sentences go first, so that subsets are only looked for
+        once the sentences have shrunk as far as marking takes them.
+        """
+        while self.resolvable or self.pending:
+
+            # Mark cells known to be mines or safe; the sentence empties and is dropped
+            if self.resolvable:
+                sentence = self.resolvable.popleft()
+                if sentence not in self.knowledge: # Changed or dropped since it was queued
+                    continue
+                if sentence.count == 0:
+                    for safe in tuple(sentence.cells):
+                        self.mark_safe(safe)
+                else:
+                    for mine in tuple(sentence.cells):
+                        self.mark_mine(mine)
+                continue
+
+            sentence = self.pending.popleft()
+            if sentence not in self.knowledge:
+                continue
+
+            # Only sentences sharing a cell can be subsets of each other
+            others = set()
+            for cell in sentence.cells:
+                others.update(self.index[cell])
+            for other in others:
+                if len(sentence) < len(other) and sentence.issubset(other):
+                    self.add_sentence(other.difference(sentence))
+                elif len(other) < len(sentence) and other.issubset(sentence):
+                    self.add_sentence(sentence.difference(other))
 
     def neighbors(self, cell):
         """
@@ -267,11 +602,7 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        moves = self.safes - self.moves_made
-        if moves:
-            return random.choice(tuple(moves))
-        else:
-            return None
+        return self.safe_moves.choice()
 
     def make_random_move(self):
         """
@@ -280,8 +611,23 @@ class MinesweeperAI():
             1) have not already been chosen, and
             2) are not known to be mines
         """
-        moves = self.allMoves - self.moves_made - self.mines
-        if moves:
-            return random.choice(tuple(moves))
-        else:
-            return None
\ No newline at end of file
+        return self.random_moves.choice()
+
+    def make_least_risky_move(self):
+        """
+        Returns a move to make on the Minesweeper board: a known safe cell
+        if there is one, otherwise the cell least likely to be a mine.
+        The probabilities need the number of mines on the board; without
+        it a random move is made.
+        """
+        move = self.make_safe_move()
+        if move is not None or self.total_mines is None:
+            return move if move is not None else self.make_random_move()
+        # No safe move is left, so every random move is an unknown cell
+        unknown = set(self.random_moves)
+        if not unknown:
+            return None
+        probabilities = probability.mine_probabilities(
+            self.knowledge, unknown, self.total_mines - len(self.mines))
+        lowest = min(probabilities.values())
+        return random.choice([cell for cell in sorted(unknown) if probabilities[cell] == lowest])
@@ -0,0 +1,261 @@
+"""
+Mine probabilities for the Minesweeper AI.
+
+The sentences of the knowledge base are split into independent components,
+groups of cells linked by sentences. The solutions of every component are
+counted by number of mines with memoized backtracking, and combined with
+the number of mines left on the board: a solution of the whole frontier
+with K mines can be completed in C(u, mines_left - K) ways, where u is the
+number of unknown cells outside every sentence. This gives the exact
+probability that each unknown cell is a mine.
+
+Components with more than EXACT_LIMIT cells are sampled instead.
+"""
+
+import math
+import random
+from collections import deque
+
+# Components with more cells than this are sampled instead of enumerated
+EXACT_LIMIT = 64
+
+# Solutions drawn from every sampled component
+SAMPLES = 2000
+
+
+def choose(n, k):
+    """
+    Returns the binomial coefficient C(n, k), 0 if k is out of range.
+    """
+    if k < 0 or k > n:
+        return 0
+    return math.comb(n, k)
+
+
+def components(sentences):
+    """
+    Returns the connected components of the cells in sentences, as a list
+    of (cells, sentences) pairs. Two cells are connected if a sentence
+    contains both.
+    """
+    parent = {}
+
+    def find(cell):
+        root = cell
+        while parent[root] != root:
+            root = parent[root]
+        while parent[cell] != root:
+            parent[cell], cell = root, parent[cell]
+        return root
+
+    for sentence in sentences:
+        cells = iter(sentence.cells)
+        first = next(cells)
+        parent.setdefault(first, first)
+        for cell in cells:
+            parent.setdefault(cell, cell)
+            a, b = find(first), find(cell)
+            if a != b:
+                parent[b] = a
+
+    groups = {}
+    for sentence in sentences:
+        groups.setdefault(find(next(iter(sentence.cells))), []).append(sentence)
+    return [(order(group), group) for group in groups.values()]
+
+
+def order(sentences):
+    """
+    Returns the cells of sentences in breadth first order through the
+    sentences, which keeps few sentences partly assigned at a time.
+    """
+    by_cell = {}
+    for sentence in sentences:
+        for cell in sentence.cells:
+            by_cell.setdefault(cell, []).append(sentence)
+    start = min(by_cell)
+    cells, seen, queue = [], {start}, deque([start])
+    while queue:
+        cell = queue.popleft()
+        cells.append(cell)
+        for sentence in by_cell[cell]:
+            for other in sorted(sentence.cells):
+                if other not in seen:
+                    seen.add(other)
+                    queue.append(other)
+    return cells
+
+
+class Component():
+    """
+    The cells of a component, in search order, and its sentences as
+    lists of cell positions with their mine counts.
+    """
+
+    def __init__(self, cells, sentences):
+        self.cells = cells
+        position = {cell: p for p, cell in enumerate(cells)}
+        members = [sorted(position[cell] for cell in sentence.cells) for sentence in sentences]
+        self.counts = [sentence.count for sentence in sentences]
+
+        # For every position, the sentences containing it and how many of
+        # their cells come after it
+        self.touching = [[] for _ in cells]
+        self.after = [[] for _ in cells]
+        for c, positions in enumerate(members):
+            for rank, p in enumerate(positions):
+                self.touching[p].append(c)
+                self.after[p].append(len(positions) - rank - 1)
+
+        # Sentences partly assigned when position p is reached: the state a
+        # search from p depends on
+        self.active = [[] for _ in range(len(cells) + 1)]
+        for c, positions in enumerate(members):
+            for p in range(positions[0] + 1, positions[-1] + 1):
+                self.active[p].append(c)
+
+    def feasible(self, p, residual):
+        """
+        Returns whether every sentence through position p can still be
+        satisfied by the cells after it.
+        """
+        for c, left in zip(self.touching[p], self.after[p]):
+            if residual[c] < 0 or residual[c] > left:
+                return False
+        return True
+
+    def enumerate(self):
+        """
+        Returns a dict mapping every number of mines k to the number of
+        solutions with k mines and, for every cell, in how many of those
+        solutions it is a mine.
+        """
+        n = len(self.cells)
+        residual = list(self.counts)
+        memo = {}
+
+        def solve(p):
+            if p == n:
+                return {0: (1, [])}
+            key = (p, tuple(residual[c] for c in self.active[p]))
+            if key in memo:
+                return memo[key]
+            found = {}
+            for mine in (0, 1):
+                for c in self.touching[p]:
+                    residual[c] -= mine
+                if self.feasible(p, residual):
+                    for k, (ways, counts) in solve(p + 1).items():
+                        total, cells = found.get(k + mine, (0, [0] * (n - p)))
+                        cells = [cells[0] + mine * ways] + [a + b for a, b in zip(cells[1:], counts)]
+                        found[k + mine] = (total + ways, cells)
+                for c in self.touching[p]:
+                    residual[c] += mine
+            memo[key] = found
+            return found
+
+        return solve(0)
+
+    def sample(self, samples, rng):
+        """
+        Returns an estimate of enumerate() from samples random walks.
+
+        Every walk assigns the cells in order, choosing uniformly between
+        the values that can still lead to a solution, and is weighted by
+        the product of the number of choices it had. The weighted counts
+        are unbiased estimates of the solution counts (Knuth's estimator);
+        walks that reach a dead end count for nothing.
+        """
+        n = len(self.cells)
+        dead = set() # States known to have no solution
+        found = {}
+        for _ in range(samples):
+            residual = list(self.counts)
+            assignment = []
+            weight = 1
+            for p in range(n):
+                options = []
+                for mine in (0, 1):
+                    for c in self.touching[p]:
+                        residual[c] -= mine
+                    if (self.feasible(p, residual)
+                            and (p + 1, tuple(residual[c] for c in self.active[p + 1])) not in dead):
+                        options.append(mine)
+                    for c in self.touching[p]:
+                        residual[c] += mine
+                if not options:
+                    dead.add((p, tuple(residual[c] for c in self.active[p])))
+                    weight = 0
+                    break
+                mine = rng.choice(options)
+                for c in self.touching[p]:
+                    residual[c] -= mine
+                assignment.append(mine)
+                weight *= len(options)
+            if weight:
+                total, cells = found.get(sum(assignment), (0, [0] * n))
+                found[sum(assignment)] = (total + weight, [a + weight * b for a, b in zip(cells, assignment)])
+        return found
+
+
+def convolve(a, b):
+    """
+    Returns the distribution of the number of mines of two independent
+    parts, given as dicts mapping mines to number of solutions.
+    """
+    result = {}
+    for i, x in a.items():
+        for j, y in b.items():
+            result[i + j] = result.get(i + j, 0) + x * y
+    return result
+
+
+def mine_probabilities(sentences, unknown, mines_left, rng=random,
+                       exact_limit=EXACT_LIMIT, samples=SAMPLES):
+    """
+    Returns a dict mapping every cell in unknown to the probability that it
+    is a mine, given the sentences (whose cells must all be unknown) and
+    the number of mines among the unknown cells.
+    """
+    parts = []
+    frontier = set()
+    for cells, group in components(sentences):
+        component = Component(cells, group)
+        if len(cells) > exact_limit:
+            solutions = component.sample(samples, rng)
+        else:
+            solutions = component.enumerate()
+        parts.append((cells, solutions))
+        frontier.update(cells)
+    others = [cell for cell in unknown if cell not in frontier]
+    u = len(others)
+
+    # Mine distributions of all components before and after each one
+    ways = [{k: w for k, (w, _) in solutions.items()} for _, solutions in parts]
+    prefix = [{0: 1}]
+    for distribution in ways:
+        prefix.append(convolve(prefix[-1], distribution))
+    suffix = [{0: 1}]
+    for distribution in reversed(ways):
+        suffix.append(convolve(suffix[-1], distribution))
+    suffix.reverse()
+
+    total = sum(w * choose(u, mines_left - k) for k, w in prefix[-1].items())
+    if total == 0:
+        raise ValueError("the sentences and the number of mines left contradict each other")
+
+    probabilities = {}
+    for i, (cells, solutions) in enumerate(parts):
+        rest = convolve(prefix[i], suffix[i + 1])
+        weight = {k: sum(w * choose(u, mines_left - k - j) for j, w in rest.items()) for k in solutions}
+        mines = [0] * len(cells)
+        for k, (_, counts) in solutions.items():
+            for p, count in enumerate(counts):
+                mines[p] += count * weight[k]
+        for cell, count in zip(cells, mines):
+            probabilities[cell] = count / total
+    if u:
+        outside = sum(w * choose(u - 1, mines_left - k - 1) for k, w in prefix[-1].items())
+        for cell in others:
+            probabilities[cell] = outside / total
+    return probabilities
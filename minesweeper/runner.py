@@ -1,6 +1,9 @@
 import pygame
+import queue
 import sys
+import threading
 import time
+from concurrent.futures import Future
 
 from minesweeper import Minesweeper, MinesweeperAI
 
@@ -17,6 +20,8 @@ WHITE = (255, 255, 255)
 pygame.init()
 size = width, height = 600, 400
 screen = pygame.display.set_mode(size)
+clock = pygame.time.Clock()
+FPS = 30
 
 # Fonts
 OPEN_SANS = "assets/fonts/OpenSans-Regular.ttf"
@@ -37,15 +42,173 @@ flag = pygame.transform.scale(flag, (cell_size, cell_size))
 mine = pygame.image.load("assets/images/mine.png")
 mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
+# Rendered text surfaces, keyed by (font, text, color)
+glyphs = {}
+
+
+def render(font, text, color):
+    """
+    Returns the surface of text, rendering it only the first time.
+    """
+    key = (font, text, color)
+    if key not in glyphs:
+        glyphs[key] = font.render(text, True, color)
+    return glyphs[key]
+
+
+def blit_centered(surface, center):
+    """
+    Draws surface on the screen centered at center.
+    """
+    rect = surface.get_rect()
+    rect.center = center
+    screen.blit(surface, rect)
+
+
+def make_button(rect, text):
+    """
+    Returns a surface the size of rect showing a white button labelled text.
+    """
+    surface = pygame.Surface(rect.size)
+    surface.fill(WHITE)
+    label = render(mediumFont, text, BLACK)
+    labelRect = label.get_rect()
+    labelRect.center = (rect.width / 2, rect.height / 2)
+    surface.blit(label, labelRect)
+    return surface
+
+
+# Static layout
+buttonRect = pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50)
+aiButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
+    (width / 3) - BOARD_PADDING * 2, 50
+)
+resetButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
+    (width / 3) - BOARD_PADDING * 2, 50
+)
+buttons = {
+    "Play Game": make_button(buttonRect, "Play Game"),
+    "AI Move": make_button(aiButton, "AI Move"),
+    "Reset": make_button(resetButton, "Reset")
+}
+textRect = pygame.Rect((2 / 3) * width, (2 / 3) * height - 25, width / 3, 50)
+cells = [
+    [
+        pygame.Rect(
+            board_origin[0] + j * cell_size,
+            board_origin[1] + i * cell_size,
+            cell_size, cell_size
+        )
+        for j in range(WIDTH)
+    ]
+    for i in range(HEIGHT)
+]
+
+# What each region of the screen currently shows, and the rects to update this frame
+drawn = {}
+dirty = []
+
+
+def draw(region, rect, content, paint):
+    """
+    Repaints rect with paint() if the region should now show something
+    other than what it shows.
+    """
+    if region in drawn and drawn[region] == content:
+        return
+    screen.fill(BLACK, rect)
+    paint()
+    drawn[region] = content
+    dirty.append(rect)
+
+
+def show_screen(name):
+    """
+    Clears the window when switching from the instructions to the game.
+    """
+    if drawn.get("screen") != name:
+        drawn.clear()
+        drawn["screen"] = name
+        screen.fill(BLACK)
+        dirty.append(screen.get_rect())
+
+
+def paint_cell(rect, content):
+    """
+    Draws a cell showing content: "mine", "flag", a number of nearby
+    mines or None.
+    """
+    pygame.draw.rect(screen, GRAY, rect)
+    pygame.draw.rect(screen, WHITE, rect, 3)
+    if content == "mine":
+        screen.blit(mine, rect)
+    elif content == "flag":
+        screen.blit(flag, rect)
+    elif content is not None:
+        blit_centered(render(smallFont, str(content), BLACK), rect.center)
+
+
+class Worker():
+    """
+    Runs calls in order on a daemon thread of its own.
+
+    A call that is running can not be stopped. cancel() drops the calls
+    that have not started and lets the thread end after the one in hand,
+    whose result is then ignored. A new Worker starts at once on a fresh
+    thread instead of waiting behind it, and daemon threads do not hold
+    up quitting.
+    """
+
+    def __init__(self):
+        self.calls = queue.SimpleQueue()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def submit(self, function, *args):
+        """
+        Queues function(*args) and returns a Future for its result.
+        """
+        future = Future()
+        self.calls.put((future, function, args))
+        return future
+
+    def run(self):
+        while True:
+            call = self.calls.get()
+            if call is None: # Cancelled
+                return
+            future, function, args = call
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(function(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+    def cancel(self, futures=()):
+        """
+        Cancels futures that have not started, and ends the thread once
+        the call it is running, if any, returns.
+        """
+        for future in futures:
+            future.cancel()
+        self.calls.put(None)
+
+
 # Create game and AI agent
 game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
 
-# Keep track of revealed cells, flagged cells, and if a mine was hit
-revealed = set()
+# Keep track of revealed cells with their nearby mine counts, flagged cells, and if a mine was hit
+revealed = {}
 flags = set()
 lost = False
 
+# AI knowledge updates run in order on a worker thread so the window keeps drawing
+worker = Worker()
+pending = []
+
 # Show instructions initially
 instructions = True
 
@@ -56,36 +219,34 @@ while True:
         if event.type == pygame.QUIT:
             sys.exit()
 
-    screen.fill(BLACK)
+    # Collect finished knowledge updates; result() raises any error they hit
+    for future in pending:
+        if future.done():
+            future.result()
+    pending = [future for future in pending if not future.done()]
+    thinking = len(pending) > 0
 
     # Show game instructions
     if instructions:
 
-        # Title
-        title = largeFont.render("Play Minesweeper", True, WHITE)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 50)
-        screen.blit(title, titleRect)
-
-        # Rules
-        rules = [
-            "Click a cell to reveal it.",
-            "Right-click a cell to mark it as a mine.",
-            "Mark all mines successfully to win!"
-        ]
-        for i, rule in enumerate(rules):
-            line = smallFont.render(rule, True, WHITE)
-            lineRect = line.get_rect()
-            lineRect.center = ((width / 2), 150 + 30 * i)
-            screen.blit(line, lineRect)
-
-        # Play game button
-        buttonRect = pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50)
-        buttonText = mediumFont.render("Play Game", True, BLACK)
-        buttonTextRect = buttonText.get_rect()
-        buttonTextRect.center = buttonRect.center
-        pygame.draw.rect(screen, WHITE, buttonRect)
-        screen.blit(buttonText, buttonTextRect)
+        # The instructions never change, so they are drawn only once
+        if drawn.get("screen") != "instructions":
+            show_screen("instructions")
+
+            # Title
+            blit_centered(render(largeFont, "Play Minesweeper", WHITE), ((width / 2), 50))
+
+            # Rules
+            rules = [
+                "Click a cell to reveal it.",
+                "Right-click a cell to mark it as a mine.",
+                "Mark all mines successfully to win!"
+            ]
+            for i, rule in enumerate(rules):
+                blit_centered(render(smallFont, rule, WHITE), ((width / 2), 150 + 30 * i))
+
+            # Play game button
+            screen.blit(buttons["Play Game"], buttonRect)
 
         # Check if play button clicked
         click, _, _ = pygame.mouse.get_pressed()
@@ -95,128 +256,98 @@ while True:
                 instructions = False
                 time.sleep(0.3)
 
-        pygame.display.flip()
-        continue
-
-    # Draw board
-    cells = []
-    for i in range(HEIGHT):
-        row = []
-        for j in range(WIDTH):
-
-            # Draw rectangle for cell
-            rect = pygame.Rect(
-                board_origin[0] + j * cell_size,
-                board_origin[1] + i * cell_size,
-                cell_size, cell_size
-            )
-            pygame.draw.rect(screen, GRAY, rect)
-            pygame.draw.rect(screen, WHITE, rect, 3)
-
-            # Add a mine, flag, or number if needed
-            if game.is_mine((i, j)) and lost:
-                screen.blit(mine, rect)
-            elif (i, j) in flags:
-                screen.blit(flag, rect)
-            elif (i, j) in revealed:
-                neighbors = smallFont.render(
-                    str(game.nearby_mines((i, j))),
-                    True, BLACK
-                )
-                neighborsTextRect = neighbors.get_rect()
-                neighborsTextRect.center = rect.center
-                screen.blit(neighbors, neighborsTextRect)
-
-            row.append(rect)
-        cells.append(row)
-
-    # AI Move button
-    aiButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("AI Move", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = aiButton.center
-    pygame.draw.rect(screen, WHITE, aiButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Reset button
-    resetButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("Reset", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = resetButton.center
-    pygame.draw.rect(screen, WHITE, resetButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Display text
-    text = "Lost" if lost else "Won" if game.mines == flags else ""
-    text = mediumFont.render(text, True, WHITE)
-    textRect = text.get_rect()
-    textRect.center = ((5 / 6) * width, (2 / 3) * height)
-    screen.blit(text, textRect)
-
-    move = None
-
-    left, _, right = pygame.mouse.get_pressed()
-
-    # Check for a right-click to toggle flagging
-    if right == 1 and not lost:
-        mouse = pygame.mouse.get_pos()
+    else:
+        show_screen("game")
+
+        # Draw board, only the cells that changed
         for i in range(HEIGHT):
             for j in range(WIDTH):
-                if cells[i][j].collidepoint(mouse) and (i, j) not in revealed:
-                    if (i, j) in flags:
-                        flags.remove((i, j))
-                    else:
-                        flags.add((i, j))
-                    time.sleep(0.2)
 
-    elif left == 1:
-        mouse = pygame.mouse.get_pos()
+                # A mine, flag, number or nothing
+                if lost and game.is_mine((i, j)):
+                    content = "mine"
+                elif (i, j) in flags:
+                    content = "flag"
+                else:
+                    content = revealed.get((i, j))
+                draw((i, j), cells[i][j], content,
+                     lambda rect=cells[i][j], content=content: paint_cell(rect, content))
+
+        # AI Move and Reset buttons
+        draw("ai", aiButton, True, lambda: screen.blit(buttons["AI Move"], aiButton))
+        draw("reset", resetButton, True, lambda: screen.blit(buttons["Reset"], resetButton))
+
+        # Display text
+        dots = "." * (int(time.time() * 3) % 4)
+        text = "Lost" if lost else "Won" if game.mines == flags else f"Thinking{dots:<3}" if thinking else ""
+        draw("text", textRect, text,
+             lambda: blit_centered(render(mediumFont, text, WHITE), textRect.center))
 
-        # If AI button clicked, make an AI move
-        if aiButton.collidepoint(mouse) and not lost:
-            move = ai.make_safe_move()
-            if move is None:
-                move = ai.make_random_move()
+        move = None
+
+        left, _, right = pygame.mouse.get_pressed()
+
+        # Check for a right-click to toggle flagging
+        if right == 1 and not lost:
+            mouse = pygame.mouse.get_pos()
+            for i in range(HEIGHT):
+                for j in range(WIDTH):
+                    if cells[i][j].collidepoint(mouse) and (i, j) not in revealed:
+                        if (i, j) in flags:
+                            flags.remove((i, j))
+                        else:
+                            flags.add((i, j))
+                        time.sleep(0.2)
+
+        elif left == 1:
+            mouse = pygame.mouse.get_pos()
+
+            # If AI button clicked, make an AI move once its knowledge is up to date
+            if aiButton.collidepoint(mouse) and not lost and not thinking:
+                move = ai.make_safe_move()
                 if move is None:
-                    flags = ai.mines.copy()
-                    print("No moves left to make.")
+                    move = ai.make_least_risky_move()
+                    if move is None:
+                        flags = ai.mines.copy()
+                        print("No moves left to make.")
+                    else:
+                        print("No known safe moves, AI making least risky move.")
                 else:
-                    print("No known safe moves, AI making random move.")
+                    print("AI making safe move.")
+                time.sleep(0.2)
+
+            # Reset game state
+            elif resetButton.collidepoint(mouse):
+                # An update already running finishes on the old worker, on the old AI
+                worker.cancel(pending)
+                worker = Worker()
+                pending = []
+                game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
+                ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
+                revealed = {}
+                flags = set()
+                lost = False
+
+            # User-made move
+            elif not lost:
+                for i in range(HEIGHT):
+                    for j in range(WIDTH):
+                        if (cells[i][j].collidepoint(mouse)
+                                and (i, j) not in flags
+                                and (i, j) not in revealed):
+                            move = (i, j)
+
+        # Make move and update AI knowledge
+        if move:
+            if game.is_mine(move):
+                lost = True
             else:
-                print("AI making safe move.")
-            time.sleep(0.2)
-
-        # Reset game state
-        elif resetButton.collidepoint(mouse):
-            game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
-            revealed = set()
-            flags = set()
-            lost = False
-            continue
-
-        # User-made move
-        elif not lost:
-            for i in range(HEIGHT):
-                for j in range(WIDTH):
-                    if (cells[i][j].collidepoint(mouse)
-                            and (i, j) not in flags
-                            and (i, j) not in revealed):
-                        move = (i, j)
-
-    # Make move and update AI knowledge
-    if move:
-        if game.is_mine(move):
-            lost = True
-        else:
-            nearby = game.nearby_mines(move)
-            revealed.add(move)
-            ai.add_knowledge(move, nearby)
-
-    pygame.display.flip()
+                nearby = game.nearby_mines(move)
+                revealed[move] = nearby
+                pending.append(worker.submit(ai.add_knowledge, move, nearby))
+
+    # Update only the parts of the window that changed, at most FPS times a second
+    if dirty:
+        pygame.display.update(dirty)
+        dirty.clear()
+    clock.tick(FPS)
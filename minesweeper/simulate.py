@@ -0,0 +1,164 @@
+"""
+Headless Minesweeper simulation and benchmark of MinesweeperAI.
+
+Plays a number of seeded games, spread over a pool of worker processes,
+and reports the win rate, the moves made per second, the per-move latency
+percentiles and how large the knowledge base grows over a game. Game i
+is played with seed SEED + i, so runs with the same options play the same
+games and can be compared.
+
+A move is a known safe cell if the AI has one, otherwise a random move
+(--strategy random) or the cell least likely to be a mine (least-risky,
+the default). A game is won when every safe cell has been revealed.
+
+Usage: python simulate.py [-n GAMES] [--height H] [--width W]
+                          [--density D] [--seed SEED] [-w WORKERS]
+                          [--strategy least-risky|random] [--bitsets]
+                          [--solver] [--json FILE]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+STRATEGIES = ["least-risky", "random"]
+
+# Knowledge base sizes are reported for each tenth of the safe cells revealed
+STAGES = 10
+
+
+def play_game(height, width, mines, seed, strategy="least-risky", bitsets=False, solver=False):
+    """
+    Plays one game and returns whether it was won, the latency of every
+    move and the size of the knowledge base at each stage of the game.
+    Runs in a worker process.
+    """
+    # The board draws from a Random(seed) of its own; the AI's random moves
+    # get a seed derived from it, so the two streams do not line up
+    random.seed(random.Random(seed).getrandbits(64))
+    game = Minesweeper(height=height, width=width, mines=mines, seed=seed)
+    ai = MinesweeperAI(height=height, width=width, mines=mines, bitsets=bitsets, solver=solver)
+    safe_cells = height * width - mines
+    latencies = []
+    sizes = [[] for _ in range(STAGES)]
+    won = False
+
+    while True:
+        started = time.perf_counter()
+        if strategy == "random":
+            move = ai.make_safe_move()
+            if move is None:
+                move = ai.make_random_move()
+        else:
+            move = ai.make_least_risky_move()
+        if move is None or game.is_mine(move):
+            latencies.append(time.perf_counter() - started)
+            break
+        ai.add_knowledge(move, game.nearby_mines(move))
+        latencies.append(time.perf_counter() - started)
+
+        revealed = len(ai.moves_made)
+        sizes[min(STAGES - 1, revealed * STAGES // safe_cells)].append(len(ai.knowledge))
+        if revealed == safe_cells:
+            won = True
+            break
+
+    return {"won": won, "latencies": latencies,
+            "sizes": [max(stage) if stage else None for stage in sizes]}
+
+
+def percentile(values, q):
+    """
+    Returns the q-th percentile (0-100) of the sorted list values, by the
+    nearest rank method.
+    """
+    if not values:
+        return 0.0
+    return values[max(0, min(len(values) - 1, round(q / 100 * len(values)) - 1))]
+
+
+def simulate(games=100, height=16, width=16, density=0.15, seed=0, workers=None,
+             strategy="least-risky", bitsets=False, solver=False):
+    """
+    Plays games games and returns a dict with the results.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"unknown strategy {strategy!r}")
+    mines = round(density * height * width)
+    if not 0 < mines < height * width:
+        raise ValueError(f"a density of {density} leaves no mines or no safe cells")
+    seeds = [seed + i for i in range(games)]
+
+    started = time.perf_counter()
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            played = list(executor.map(play_game, [height] * games, [width] * games, [mines] * games,
+                                       seeds, [strategy] * games, [bitsets] * games, [solver] * games,
+                                       chunksize=max(1, games // (workers * 4))))
+    else:
+        played = [play_game(height, width, mines, s, strategy, bitsets, solver) for s in seeds]
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for game in played for latency in game["latencies"])
+    thinking = sum(latencies)
+    wins = sum(game["won"] for game in played)
+    knowledge = []
+    for stage in range(STAGES):
+        sizes = [game["sizes"][stage] for game in played if game["sizes"][stage] is not None]
+        knowledge.append({"revealed": f"{stage * 100 // STAGES}-{(stage + 1) * 100 // STAGES}%",
+                          "games": len(sizes),
+                          "mean": statistics.mean(sizes) if sizes else 0.0,
+                          "max": max(sizes, default=0)})
+    return {"games": games, "height": height, "width": width, "mines": mines, "seed": seed,
+            "strategy": strategy, "bitsets": bitsets, "solver": solver,
+            "wins": wins, "win_rate": wins / games if games else 0.0,
+            "moves": len(latencies), "seconds": elapsed,
+            "moves_per_second": len(latencies) / thinking if thinking else 0.0,
+            "latency_ms": {f"p{q}": percentile(latencies, q) * 1000 for q in (50, 90, 99, 100)},
+            "knowledge": knowledge}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless Minesweeper games with the AI.")
+    parser.add_argument("-n", "--games", type=int, default=100, help="number of games")
+    parser.add_argument("--height", type=int, default=16, help="board height")
+    parser.add_argument("--width", type=int, default=16, help="board width")
+    parser.add_argument("--density", type=float, default=0.15, help="fraction of cells that are mines")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--strategy", default="least-risky", choices=STRATEGIES,
+                        help="move when no safe cell is known")
+    parser.add_argument("--bitsets", action="store_true", help="keep sentences as BitSentence")
+    parser.add_argument("--solver", action="store_true", help="use the global linear solver too")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    try:
+        report = simulate(args.games, args.height, args.width, args.density, args.seed,
+                          args.workers, args.strategy, args.bitsets, args.solver)
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+
+    print(f"{report['games']} games on {report['height']}x{report['width']} with {report['mines']} mines "
+          f"({report['strategy']}{', bitsets' if report['bitsets'] else ''}"
+          f"{', solver' if report['solver'] else ''})")
+    print(f"Win rate: {report['win_rate']:.1%} ({report['wins']}/{report['games']})")
+    print(f"Moves: {report['moves']}, {report['moves_per_second']:.0f} moves/s, "
+          f"{report['seconds']:.2f}s in total")
+    print("Latency (ms): " + ", ".join(f"{q} {ms:.3f}" for q, ms in report["latency_ms"].items()))
+    print(f"{'revealed':<10} {'games':>6} {'mean KB':>9} {'max KB':>8}")
+    for stage in report["knowledge"]:
+        print(f"{stage['revealed']:<10} {stage['games']:>6} {stage['mean']:>9.1f} {stage['max']:>8}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
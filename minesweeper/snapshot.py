@@ -0,0 +1,296 @@
+"""
+Binary snapshots of Minesweeper games and MinesweeperAI knowledge.
+
+A snapshot holds a game, an AI or both, taken between moves. Sets of
+cells are stored as bitmaps of height * width bits, and the sentences of
+the knowledge base as three arrays: their mine counts, their lengths and
+all their cells' board indexes (i * width + j) one after the other.
+Everything is little-endian and every section starts on a 4-byte
+boundary, so a snapshot file can be memory-mapped and read in place:
+open_snapshot() answers lookups such as is_mine() straight from the
+mapping, and builds the Python objects only when game() or ai() is
+called. dumps() and loads() do the same with bytes, e.g. to send
+positions to worker processes.
+
+Layout:
+    header      magic, version, flags, height, width, total mines (-1 unknown)
+    game        mines bitmap, mines found bitmap
+    ai          moves made, mines and safes bitmaps,
+                sentence count, cell count, counts, lengths, cells
+The linear system of an AI in solver mode is not stored; it is rebuilt
+from the sentences, which are equations about the same cells.
+"""
+
+import mmap
+import struct
+
+from minesweeper import Minesweeper, MinesweeperAI, Sentence, BitSentence
+
+MAGIC = b"MSNP"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIq")
+COUNTS = struct.Struct("<II")
+
+# Flags
+GAME = 1
+AI = 2
+BITSETS = 4
+SOLVER = 8
+
+# Bit positions set in every byte value
+BITS = [[bit for bit in range(8) if byte >> bit & 1] for byte in range(256)]
+
+
+def padded(size):
+    """
+    Returns size rounded up to a multiple of 4.
+    """
+    return (size + 3) & ~3
+
+
+def encode_cells(cells, height, width):
+    """
+    Returns the bitmap of a set of cells, padded to a multiple of 4 bytes.
+    """
+    bitmap = bytearray(padded((height * width + 7) // 8))
+    for i, j in cells:
+        index = i * width + j
+        bitmap[index >> 3] |= 1 << (index & 7)
+    return bitmap
+
+
+def decode_cells(bitmap, width):
+    """
+    Returns the set of cells in a bitmap.
+    """
+    cells = set()
+    for offset, byte in enumerate(bitmap):
+        if byte:
+            for bit in BITS[byte]:
+                cells.add(divmod(offset * 8 + bit, width))
+    return cells
+
+
+def dumps(game=None, ai=None):
+    """
+    Returns the snapshot of a game, an AI or both as bytes.
+    """
+    if game is None and ai is None:
+        raise ValueError("nothing to snapshot")
+    if game is not None and ai is not None and (game.height, game.width) != (ai.height, ai.width):
+        raise ValueError("the game and the AI are not on the same board")
+    height, width = (game.height, game.width) if game is not None else (ai.height, ai.width)
+
+    flags = 0
+    total = -1
+    sections = []
+    if game is not None:
+        flags |= GAME
+        total = len(game.mines)
+        sections += [encode_cells(game.mines, height, width), encode_cells(game.mines_found, height, width)]
+    if ai is not None:
+        flags |= AI
+        flags |= BITSETS if ai.bitsets else 0
+        flags |= SOLVER if ai.system is not None else 0
+        if ai.total_mines is not None:
+            total = ai.total_mines
+        sentences = list(ai.knowledge)
+        counts = [sentence.count for sentence in sentences]
+        lengths = [len(sentence) for sentence in sentences]
+        cells = [i * width + j for sentence in sentences for i, j in sentence.cells]
+        sections += [encode_cells(ai.moves_made, height, width),
+                     encode_cells(ai.mines, height, width),
+                     encode_cells(ai.safes, height, width),
+                     COUNTS.pack(len(sentences), len(cells)),
+                     struct.pack(f"<{len(counts)}i", *counts),
+                     struct.pack(f"<{len(lengths)}I", *lengths),
+                     struct.pack(f"<{len(cells)}I", *cells)]
+    return HEADER.pack(MAGIC, VERSION, flags, height, width, total) + b"".join(sections)
+
+
+class Snapshot():
+    """
+    A snapshot read in place from a buffer, such as bytes or a memory map.
+    resources are closed with the snapshot.
+    """
+
+    def __init__(self, buffer, resources=()):
+        self.resources = resources
+        self.buffer = memoryview(buffer)
+        self.views = []
+        try:
+            self.parse()
+        except ValueError:
+            self.release()
+            raise
+
+    def parse(self):
+        """
+        Reads the header and makes the views of the sections, each
+        checked to be in the buffer before it is read.
+        Raises ValueError if the buffer is not a whole snapshot.
+        """
+        if len(self.buffer) < HEADER.size:
+            raise ValueError("not a Minesweeper snapshot")
+        magic, version, self.flags, self.height, self.width, total = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a Minesweeper snapshot")
+        self.total_mines = None if total < 0 else total
+
+        size = padded((self.height * self.width + 7) // 8)
+        self.offset = HEADER.size
+        self.bitmaps = {}
+        names = (["mines", "mines_found"] if self.flags & GAME else []) + \
+                (["moves_made", "ai_mines", "safes"] if self.flags & AI else [])
+        for name in names:
+            self.bitmaps[name] = self.section(size)
+        if self.flags & AI:
+            self.sentences, cells = COUNTS.unpack(self.section(COUNTS.size))
+            self.counts = self.section(4 * self.sentences, "i")
+            self.lengths = self.section(4 * self.sentences, "I")
+            self.cells = self.section(4 * cells, "I")
+
+    def section(self, size, format="B"):
+        """
+        Returns a view of the next size bytes of the buffer, as items of
+        the struct format.
+        Raises ValueError if the buffer ends first.
+        """
+        if self.offset + size > len(self.buffer):
+            raise ValueError("truncated Minesweeper snapshot")
+        view = self.buffer[self.offset:self.offset + size]
+        self.views.append(view)
+        if format != "B":
+            view = view.cast(format)
+            self.views.append(view)
+        self.offset += size
+        return view
+
+    def contains(self, name, cell):
+        """
+        Returns whether cell is in the bitmap name.
+        """
+        index = cell[0] * self.width + cell[1]
+        return bool(self.bitmaps[name][index >> 3] >> (index & 7) & 1)
+
+    def is_mine(self, cell):
+        """
+        Returns whether cell holds a mine, without building the game.
+        """
+        return self.contains("mines", cell)
+
+    def game(self):
+        """
+        Returns the Minesweeper game of the snapshot, or None.
+        """
+        if not self.flags & GAME:
+            return None
+        game = Minesweeper(height=self.height, width=self.width, mines=0)
+        game.mines = decode_cells(self.bitmaps["mines"], self.width)
+        game.mines_found = decode_cells(self.bitmaps["mines_found"], self.width)
+        return game
+
+    def ai(self):
+        """
+        Returns the MinesweeperAI of the snapshot, or None.
+        """
+        if not self.flags & AI:
+            return None
+        ai = MinesweeperAI(height=self.height, width=self.width, mines=self.total_mines,
+                           bitsets=bool(self.flags & BITSETS), solver=bool(self.flags & SOLVER))
+        ai.moves_made = decode_cells(self.bitmaps["moves_made"], self.width)
+        ai.mines = decode_cells(self.bitmaps["ai_mines"], self.width)
+        ai.safes = decode_cells(self.bitmaps["safes"], self.width)
+        for cell in ai.moves_made | ai.mines:
+            ai.random_moves.discard(cell)
+        for cell in ai.safes - ai.moves_made:
+            ai.safe_moves.add(cell)
+
+        start = 0
+        for count, length in zip(self.counts, self.lengths):
+            cells = [divmod(index, self.width) for index in self.cells[start:start + length]]
+            start += length
+            if ai.bitsets:
+                ai.add_sentence(BitSentence(cells, count, self.width))
+            else:
+                ai.add_sentence(Sentence(cells, count))
+            if ai.system is not None:
+                ai.system.add_equation(cells, count)
+
+        # Everything that follows from the sentences was drawn before the snapshot
+        ai.pending.clear()
+        ai.resolvable.clear()
+        if ai.system is not None:
+            ai.system.changed.clear()
+        return ai
+
+    def release(self):
+        """
+        Releases the views into the buffer, casts before the views they
+        were cast from.
+        """
+        for view in reversed(self.views):
+            view.release()
+        self.views = []
+        self.buffer.release()
+
+    def close(self):
+        """
+        Releases the views into the buffer and closes the resources.
+        """
+        self.release()
+        for resource in self.resources:
+            resource.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def loads(data):
+    """
+    Returns the (game, ai) of a snapshot in bytes; either may be None.
+    """
+    with Snapshot(data) as snapshot:
+        return snapshot.game(), snapshot.ai()
+
+
+def save(filename, game=None, ai=None):
+    """
+    Writes the snapshot of a game, an AI or both to a file.
+    """
+    with open(filename, "wb") as f:
+        f.write(dumps(game, ai))
+
+
+def open_snapshot(filename):
+    """
+    Returns the Snapshot of a file, memory-mapped and read in place.
+    Use it as a context manager, or close() it when done:
+
+        with snapshot.open_snapshot("game.snap") as s:
+            s.is_mine((3, 4))
+            ai = s.ai()
+    """
+    f = open(filename, "rb")
+    try:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        f.close()
+        raise
+    try:
+        return Snapshot(mapping, resources=(mapping, f))
+    except ValueError:
+        mapping.close()
+        f.close()
+        raise
+
+
+def load(filename):
+    """
+    Returns the (game, ai) of a snapshot file; either may be None.
+    """
+    with open_snapshot(filename) as snapshot:
+        return snapshot.game(), snapshot.ai()
@@ -0,0 +1,122 @@
+"""
+Batch analysis of Tic Tac Toe positions.
+
+Positions are written one per line as the 9 cells read row by row, with
+X, O and . for an empty cell (- and _ are accepted too), e.g. "X...O...X".
+For every position one tab separated line is written:
+
+    position  value  best  scores
+
+value is the minimax value (1 X wins, 0 draw, -1 O wins), best is the
+optimal move as two digits "ij" and scores lists every move as "ij:value".
+best is "-" and scores is empty if the game is over.
+
+Usage: python analyze.py [positions.txt] [-o results.tsv] [-w WORKERS]
+"""
+
+import argparse
+import itertools
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import tictactoe as ttt
+
+CELLS = {"X": ttt.X, "O": ttt.O, ".": ttt.EMPTY, "-": ttt.EMPTY, "_": ttt.EMPTY}
+
+# Number of positions handed to the worker pool at a time
+BATCH = 10000
+
+# Output fields already computed, keyed by ttt.board_key()
+results = {}
+
+
+def parse_board(text):
+    """
+    Returns the board written as text, or raises ValueError.
+    """
+    text = text.strip()
+    if(len(text) != 9 or any(c not in CELLS for c in text)):
+        raise ValueError(f"invalid position {text!r}")
+    return [[CELLS[c] for c in text[i:i + 3]] for i in range(0, 9, 3)]
+
+
+def format_board(board):
+    """
+    Returns the board written as text.
+    """
+    return "".join("." if val == ttt.EMPTY else val for row in board for val in row)
+
+
+def analyze(board):
+    """
+    Returns a dict with the minimax "value" of the board, the "best" action
+    (None if the game is over) and the value of every action in "scores".
+
+    Values are cached by canonical key in ttt.transposition, which is kept
+    between calls.
+    """
+    if(ttt.terminal(board)):
+        return {"value": ttt.utility(board), "best": None, "scores": {}}
+    scores = ttt.move_scores(board)
+    best = ttt.minimax(board)
+    return {"value": scores[best], "best": best, "scores": scores}
+
+
+def analyze_line(line):
+    """
+    Returns the output line for one input line.
+    """
+    board = parse_board(line)
+    key = ttt.board_key(board)
+    if(key not in results):
+        analysis = analyze(board)
+        best = analysis["best"]
+        scores = ",".join(f"{i}{j}:{value}" for (i, j), value in sorted(analysis["scores"].items()))
+        results[key] = "\t".join([str(analysis["value"]), "-" if best is None else f"{best[0]}{best[1]}", scores])
+    return format_board(board) + "\t" + results[key]
+
+
+def analyze_many(lines, workers=None, chunksize=256):
+    """
+    Yields the output line of every input line, in order.
+
+    With workers, lines are analyzed by a pool of that many processes that
+    is reused for the whole input, so every worker keeps its cache warm.
+    """
+    lines = (line for line in lines if line.strip())
+    if(not workers):
+        for line in lines:
+            yield analyze_line(line)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            batch = list(itertools.islice(lines, BATCH))
+            if(not batch):
+                break
+            yield from executor.map(analyze_line, batch, chunksize=chunksize)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze Tic Tac Toe positions.")
+    parser.add_argument("input", nargs="?", default="-", help="file of positions, - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file, - for stdout")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--chunksize", type=int, default=256, help="positions sent to a worker at a time")
+    args = parser.parse_args()
+
+    infile = sys.stdin if args.input == "-" else open(args.input)
+    outfile = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for line in analyze_many(infile, args.workers, args.chunksize):
+            outfile.write(line + "\n")
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+    finally:
+        if(infile is not sys.stdin):
+            infile.close()
+        if(outfile is not sys.stdout):
+            outfile.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Reproducible benchmark of the Tic Tac Toe search modes.
+
+Every mode is run over fixed sets of positions (the same for every run, see
+position_sets()) starting from an empty transposition table. Throughput,
+node counts and cache statistics are written as JSON. Given the JSON of an
+earlier run with --baseline, modes whose throughput dropped by more than
+--tolerance are reported as regressions and the exit status is 1.
+
+Usage: python benchmark.py [-o results.json] [--baseline old.json]
+                           [--tolerance 0.2] [--modes alphabeta,book]
+                           [--profile MODE]
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+import tictactoe as ttt
+import bitboard
+
+# Positions per set and the seed used to pick them
+SET_SIZE = 200
+SEED = 2020
+
+# Name -> function choosing a move on a board
+MODES = {
+    "minimax": lambda board: ttt.minimax(board, book=False),
+    "alphabeta": lambda board: ttt.minimax(board, alphabeta=True, book=False),
+    "symmetry": lambda board: ttt.minimax(board, symmetry=True, book=False),
+    "alphabeta+symmetry": lambda board: ttt.minimax(board, alphabeta=True, symmetry=True, book=False),
+    "book": lambda board: ttt.minimax(board),
+    "bitboard": bitboard.minimax,
+    "anytime": ttt.anytime_minimax,
+}
+
+
+def reachable():
+    """
+    Returns every non-terminal position reachable from the empty board,
+    grouped by the number of moves made, in a fixed order.
+    """
+    by_moves = [[] for _ in range(9)]
+    seen = set()
+    frontier = [ttt.initial_state()]
+    while frontier:
+        board = frontier.pop()
+        key = ttt.board_key(board)
+        if(key in seen or ttt.terminal(board)):
+            continue
+        seen.add(key)
+        by_moves[sum(val != ttt.EMPTY for row in board for val in row)].append(board)
+        for action in sorted(ttt.actions(board)):
+            frontier.append(ttt.result(board, action))
+    for boards in by_moves:
+        boards.sort(key=ttt.board_key)
+    return by_moves
+
+
+def position_sets(size=SET_SIZE, seed=SEED):
+    """
+    Returns a dict of named lists of positions: "opening" (0-2 moves made),
+    "middlegame" (3-5) and "endgame" (6-8), each sampled with a fixed seed.
+    """
+    by_moves = reachable()
+    rng = random.Random(seed)
+    sets = {}
+    for name, moves in [("opening", range(0, 3)), ("middlegame", range(3, 6)), ("endgame", range(6, 9))]:
+        boards = [board for n in moves for board in by_moves[n]]
+        sets[name] = boards if len(boards) <= size else rng.sample(boards, size)
+    return sets
+
+
+def clear_caches():
+    """
+    Empties every cache the search modes use.
+    """
+    ttt.transposition.clear()
+    bitboard.values.clear()
+
+
+def run(mode, boards, profile=False):
+    """
+    Returns the measurements of mode over boards, starting from empty caches.
+    """
+    clear_caches()
+    ttt.stats = ttt.SearchStats(profile=profile)
+    search = MODES[mode]
+    started = time.perf_counter()
+    for board in boards:
+        search(board)
+    elapsed = time.perf_counter() - started
+    return {"positions": len(boards), "seconds": elapsed,
+            "positions_per_second": len(boards) / elapsed if elapsed else 0.0,
+            "stats": ttt.stats.as_dict()}
+
+
+def benchmark(modes, sets):
+    """
+    Returns the measurements of every mode on every set of positions.
+    """
+    return {mode: {name: run(mode, boards) for name, boards in sets.items()} for mode in modes}
+
+
+def regressions(results, baseline, tolerance):
+    """
+    Returns a list describing every mode and set whose throughput fell by
+    more than tolerance (a fraction) compared to baseline.
+    """
+    found = []
+    for mode, by_set in results.items():
+        for name, measured in by_set.items():
+            before = baseline.get(mode, {}).get(name)
+            if(not before or not before["positions_per_second"]):
+                continue
+            change = measured["positions_per_second"] / before["positions_per_second"] - 1
+            if(change < -tolerance):
+                found.append(f"{mode}/{name}: {before['positions_per_second']:.1f} -> "
+                             f"{measured['positions_per_second']:.1f} positions/s ({change:+.0%})")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Tic Tac Toe search modes.")
+    parser.add_argument("-o", "--output", default="-", help="JSON output file, - for stdout")
+    parser.add_argument("--baseline", help="JSON output of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed throughput drop (fraction)")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma separated modes to run")
+    parser.add_argument("--size", type=int, default=SET_SIZE, help="positions per set")
+    parser.add_argument("--profile", metavar="MODE", help="print a cProfile report of MODE and exit")
+    args = parser.parse_args()
+
+    sets = position_sets(args.size)
+    if(args.profile):
+        if(args.profile not in MODES):
+            sys.exit(f"Unknown mode {args.profile}")
+        for boards in sets.values():
+            run(args.profile, boards, profile=True)
+            print(ttt.stats.profile_report())
+        return
+
+    modes = args.modes.split(",")
+    unknown = [mode for mode in modes if mode not in MODES]
+    if(unknown):
+        sys.exit(f"Unknown modes: {', '.join(unknown)}")
+    report = {"python": platform.python_version(), "size": args.size, "seed": SEED,
+              "results": benchmark(modes, sets)}
+    text = json.dumps(report, indent=2)
+    if(args.output == "-"):
+        print(text)
+    else:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+    if(args.baseline):
+        with open(args.baseline) as f:
+            found = regressions(report["results"], json.load(f)["results"], args.tolerance)
+        for line in found:
+            print(f"Regression: {line}", file=sys.stderr)
+        if(found):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
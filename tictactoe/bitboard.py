@@ -0,0 +1,178 @@
+"""
+Bitboard backend for the Tic Tac Toe player.
+
+A position is a pair of integers (x, o). Bit 3 * i + j of x is set when X
+holds cell (i, j), and likewise for o. Moves are applied with bit operations
+and wins are found by testing precomputed line masks, so no board is ever
+copied. from_board() and to_board() convert to and from the list of lists
+used by tictactoe.py and runner.py.
+"""
+
+import math
+
+import tictactoe as ttt
+
+FULL = 0b111111111
+
+# 3 rows, 3 cols, 2 diagonals
+LINES = [0b000000111, 0b000111000, 0b111000000,
+         0b001001001, 0b010010010, 0b100100100,
+         0b100010001, 0b001010100]
+
+# Best values found so far, keyed by x | o << 9
+values = {}
+
+
+def bit(action):
+    """
+    Returns the mask of cell (i, j).
+    """
+    return 1 << (3 * action[0] + action[1])
+
+
+def from_board(board):
+    """
+    Returns the (x, o) bitboards of a list of lists board.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if(board[i][j] == ttt.X):
+                x |= bit((i, j))
+            elif(board[i][j] == ttt.O):
+                o |= bit((i, j))
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Returns the list of lists board of the (x, o) bitboards.
+    """
+    board = ttt.initial_state()
+    for i in range(3):
+        for j in range(3):
+            if(x & bit((i, j))):
+                board[i][j] = ttt.X
+            elif(o & bit((i, j))):
+                board[i][j] = ttt.O
+    return board
+
+
+def count(mask):
+    """
+    Returns the number of set bits in mask.
+    """
+    return bin(mask).count("1")
+
+
+def player(x, o):
+    """
+    Returns player who has the next turn, or None if the game is over.
+    """
+    if(terminal(x, o)):
+        return None
+    return ttt.O if count(x) > count(o) else ttt.X
+
+
+def actions(x, o):
+    """
+    Returns the list of empty cells (i, j).
+    """
+    if(terminal(x, o)):
+        return None
+    empty = FULL & ~(x | o)
+    return [(n // 3, n % 3) for n in range(9) if empty & (1 << n)]
+
+
+def result(x, o, action):
+    """
+    Returns the (x, o) bitboards after the player to move plays action.
+    """
+    b = bit(action)
+    if((x | o) & b):
+        raise Exception
+    if(count(x) > count(o)):
+        return x, o | b
+    return x | b, o
+
+
+def has_line(mask):
+    """
+    Returns True if mask covers one of the winning lines.
+    """
+    for line in LINES:
+        if(mask & line == line):
+            return True
+    return False
+
+
+def winner(x, o):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if(has_line(x)):
+        return ttt.X
+    if(has_line(o)):
+        return ttt.O
+    return None
+
+
+def terminal(x, o):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return (x | o) == FULL or has_line(x) or has_line(o)
+
+
+def utility(x, o):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if(has_line(x)):
+        return 1
+    if(has_line(o)):
+        return -1
+    return 0
+
+
+def value(x, o):
+    """
+    Returns the minimax value of the position.
+    """
+    key = x | o << 9
+    if(key in values):
+        return values[key]
+    if(terminal(x, o)):
+        val = utility(x, o)
+    else:
+        empty = FULL & ~(x | o)
+        if(count(x) > count(o)): # O to move, minimize
+            val = math.inf
+            for n in range(9):
+                if(empty & (1 << n)):
+                    val = ttt.min(val, value(x, o | 1 << n))
+        else: # X to move, maximize
+            val = -math.inf
+            for n in range(9):
+                if(empty & (1 << n)):
+                    val = ttt.max(val, value(x | 1 << n, o))
+    values[key] = val
+    return val
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on a list of lists
+    board. Root moves are tried in the order of tictactoe.actions(), so the
+    result matches tictactoe.minimax().
+    """
+    x, o = from_board(board)
+    if(terminal(x, o)):
+        return None
+    maximize = count(x) == count(o)
+    best, action_to_return = (-math.inf if maximize else math.inf), None
+    for action in ttt.actions(board):
+        val = value(*result(x, o, action))
+        if((maximize and val > best) or (not maximize and val < best)):
+            best, action_to_return = val, action
+    return action_to_return
@@ -0,0 +1,82 @@
+"""
+Precomputed perfect-play table for Tic Tac Toe.
+
+Every position reachable from the empty board is solved once and stored as
+one byte at offset board_key(board) of a 3 ** 9 byte file: the minimax value
+plus 1 in bits 4-5 and the best move i * 3 + j in bits 0-3 (15 if the game is
+over). Unreachable positions hold UNKNOWN. The file is memory-mapped on first
+use, so looking up a move takes constant time and needs no search.
+
+Run "python book.py" to regenerate book.bin.
+"""
+
+import mmap
+import os
+import sys
+
+import tictactoe as ttt
+
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+SIZE = 3 ** 9
+UNKNOWN = 0xFF
+NO_MOVE = 15
+
+# Memory-mapped contents of BOOK_FILE, loaded by lookup()
+table = None
+
+
+def generate(filename=BOOK_FILE):
+    """
+    Solves every reachable position and writes the table to filename.
+    Returns the number of positions solved.
+    """
+    data = bytearray([UNKNOWN]) * SIZE
+    frontier = [ttt.initial_state()]
+    while frontier:
+        board = frontier.pop()
+        key = ttt.board_key(board)
+        if(data[key] != UNKNOWN):
+            continue
+        if(ttt.terminal(board)):
+            data[key] = (ttt.utility(board) + 1) << 4 | NO_MOVE
+            continue
+        value = ttt.max_value(board) if ttt.player(board) == ttt.X else ttt.min_value(board)
+        action = ttt.minimax(board, book=False)
+        data[key] = (value + 1) << 4 | (action[0] * 3 + action[1])
+        for action in ttt.actions(board):
+            frontier.append(ttt.result(board, action))
+    with open(filename, "wb") as f:
+        f.write(data)
+    return sum(1 for byte in data if byte != UNKNOWN)
+
+
+def load(filename=BOOK_FILE):
+    """
+    Returns the table stored in filename, memory-mapped read-only,
+    or None if the file does not exist or has the wrong size.
+    """
+    if(not os.path.exists(filename) or os.path.getsize(filename) != SIZE):
+        return None
+    with open(filename, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def lookup(board):
+    """
+    Returns (value, action) for the board, action being None if the game
+    is over, or None if the board is not in the table.
+    """
+    global table
+    if(table is None):
+        table = load() or b""
+    key = ttt.board_key(board)
+    if(key >= len(table) or table[key] == UNKNOWN):
+        return None
+    byte = table[key]
+    move = byte & 0x0F
+    return (byte >> 4) - 1, (None if move == NO_MOVE else (move // 3, move % 3))
+
+
+if __name__ == "__main__":
+    filename = sys.argv[1] if len(sys.argv) > 1 else BOOK_FILE
+    print(f"Solved {generate(filename)} positions into {filename}")
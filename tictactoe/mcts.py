@@ -0,0 +1,209 @@
+"""
+Monte Carlo Tree Search (UCT) player for Tic Tac Toe and other m,n,k games.
+
+The tree is built with the rules of a game object: the tictactoe module
+itself or an mnk.Game, both providing player(), actions(), result(),
+terminal() and utility(). Random playouts from the leaves do not use those
+functions: they play on one flat copy of the board, pick moves by swap-remove
+from a list of empty cells and only check the lines through the last move.
+"""
+
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import tictactoe as ttt
+import mnk
+
+
+class Node():
+    """
+    A position in the search tree.
+    wins are counted for the player who made the move into this node.
+    """
+
+    __slots__ = ("board", "player", "parent", "action", "children", "untried", "visits", "wins")
+
+    def __init__(self, game, board, parent=None, action=None):
+        self.board = board
+        self.player = game.player(board)
+        self.parent = parent
+        self.action = action
+        self.children = []
+        self.untried = [] if game.terminal(board) else sorted(game.actions(board))
+        self.visits = 0
+        self.wins = 0.0
+
+
+class MCTSPlayer():
+    """
+    Chooses moves by running a fixed number of playouts per move.
+
+    The subtree of the position reached is kept between moves and reused.
+    With workers, the playouts are split over that many processes that each
+    grow their own tree from the current position (root parallelization);
+    the visit counts of the root moves are summed to choose the move.
+    """
+
+    def __init__(self, game=ttt, playouts=1000, exploration=math.sqrt(2), seed=None, workers=None):
+        self.game = game
+        self.playouts = playouts
+        self.exploration = exploration
+        self.random = random.Random(seed)
+        self.workers = workers
+        self.executor = None
+        self.root = None
+
+    def move(self, board):
+        """
+        Returns the action chosen for the current player on the board.
+        """
+        if(self.game.terminal(board)):
+            return None
+        if(self.workers and self.workers > 1):
+            return self.parallel_move(board)
+        root = self.reuse(board)
+        search(self.game, root, self.playouts, self.exploration, self.random)
+        best = most_visited(root)
+        # Keep the subtree below our move for the next call
+        self.root = best
+        best.parent = None
+        return best.action
+
+    def reuse(self, board):
+        """
+        Returns the node of the board in the tree kept from the last move,
+        or a new root if the board is not in it.
+        """
+        if(self.root is not None):
+            if(self.root.board == board):
+                return self.root
+            for child in self.root.children:
+                if(child.board == board):
+                    child.parent = None
+                    return child
+        return Node(self.game, board)
+
+    def parallel_move(self, board):
+        """
+        Returns the action chosen by root parallel search.
+        """
+        if(self.executor is None):
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        game = None if self.game is ttt else self.game # Modules can not be pickled
+        share = -(-self.playouts // self.workers)
+        futures = [self.executor.submit(root_statistics, game, board, share, self.exploration,
+                                        self.random.randrange(2 ** 32))
+                   for _ in range(self.workers)]
+        visits = {}
+        for future in futures:
+            for action, count in future.result().items():
+                visits[action] = visits.get(action, 0) + count
+        return sorted(visits, key=lambda action: -visits[action])[0]
+
+    def close(self):
+        """
+        Shuts down the worker processes, if any.
+        """
+        if(self.executor is not None):
+            self.executor.shutdown()
+            self.executor = None
+
+
+def root_statistics(game, board, playouts, exploration, seed):
+    """
+    Grows a tree from board and returns the visit count of every root move.
+    Runs in a worker process of MCTSPlayer.parallel_move().
+    """
+    game = ttt if game is None else game
+    root = Node(game, board)
+    search(game, root, playouts, exploration, random.Random(seed))
+    return {child.action: child.visits for child in root.children}
+
+
+def search(game, root, playouts, exploration, rng):
+    """
+    Runs playouts iterations of selection, expansion, playout and
+    backpropagation from root.
+    """
+    geometry = mnk.Game(len(root.board), len(root.board[0]), getattr(game, "k", 3))
+    for _ in range(playouts):
+        node = root
+
+        # Selection: descend through fully expanded nodes by UCT score
+        while(not node.untried and node.children):
+            node = select(node, exploration)
+
+        # Expansion: add one untried move
+        if(node.untried):
+            action = node.untried.pop(rng.randrange(len(node.untried)))
+            child = Node(game, game.result(node.board, action), node, action)
+            node.children.append(child)
+            node = child
+
+        # Playout
+        if(game.terminal(node.board)):
+            score = game.utility(node.board)
+        else:
+            score = playout(geometry, node.board, rng)
+
+        # Backpropagation, wins counted for the player who moved into each node
+        while(node is not None):
+            node.visits += 1
+            if(node.parent is not None):
+                mover = node.parent.player
+                if(score == 0):
+                    node.wins += 0.5
+                elif((score == 1) == (mover == ttt.X)):
+                    node.wins += 1
+            node = node.parent
+
+
+def select(node, exploration):
+    """
+    Returns the child of node with the highest UCT score.
+    """
+    log_visits = math.log(node.visits)
+    best, best_score = None, -math.inf
+    for child in node.children:
+        score = child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+        if(score > best_score):
+            best, best_score = child, score
+    return best
+
+
+def most_visited(node):
+    """
+    Returns the child of node with the most visits.
+    """
+    best = node.children[0]
+    for child in node.children:
+        if(child.visits > best.visits):
+            best = child
+    return best
+
+
+def playout(geometry, board, rng):
+    """
+    Plays random moves from a non-terminal board until the game ends and
+    returns its utility. geometry is the mnk.Game with the board's lines.
+    """
+    cells = geometry.flatten(board)
+    empty = [p for p in range(len(cells)) if cells[p] == ttt.EMPTY]
+    player = ttt.O if cells.count(ttt.X) > cells.count(ttt.O) else ttt.X
+    lines, lines_through = geometry.lines, geometry.lines_through
+    while empty:
+        # Swap-remove a random empty cell
+        r = rng.randrange(len(empty))
+        p = empty[r]
+        empty[r] = empty[-1]
+        empty.pop()
+        cells[p] = player
+        for line in lines_through[p]:
+            for q in lines[line]:
+                if(cells[q] != player):
+                    break
+            else:
+                return 1 if player == ttt.X else -1
+        player = ttt.O if player == ttt.X else ttt.X
+    return 0
@@ -0,0 +1,310 @@
+"""
+m,n,k game engine: k in a row on an m x n board.
+
+Tic Tac Toe is the 3,3,3 game. Boards use the same list of lists of
+X / O / EMPTY as tictactoe.py. Larger boards can not be searched to the end,
+so Game.search() runs an iterative deepening alpha-beta search under a
+wall-clock and/or node budget, scores the positions at the depth cutoff with
+a heuristic, and returns the best move of the deepest completed iteration.
+"""
+
+import math
+import time
+from collections import namedtuple
+
+import tictactoe as ttt
+
+# Score of a won position; wins found sooner score higher
+WIN = 1000000
+
+SearchResult = namedtuple("SearchResult", ["action", "value", "depth", "nodes", "complete"])
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time or node budget runs out.
+    """
+
+
+class Game():
+    """
+    Rules and search for the m,n,k game on boards with m rows and n columns.
+    """
+
+    def __init__(self, m=3, n=3, k=3):
+        self.m = m
+        self.n = n
+        self.k = k
+
+        # Work done by search(); depth_times holds the time of each iteration
+        self.stats = ttt.SearchStats()
+
+        # Every window of k cells in a row, as flat indexes i * n + j
+        self.lines = []
+        for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+            for i in range(m):
+                for j in range(n):
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if(0 <= end_i < m and 0 <= end_j < n):
+                        self.lines.append([(i + di * s) * n + (j + dj * s) for s in range(k)])
+
+        # Indexes of the windows through each cell
+        self.lines_through = [[] for _ in range(m * n)]
+        for index, line in enumerate(self.lines):
+            for p in line:
+                self.lines_through[p].append(index)
+
+        # On large boards only moves next to a stone are searched
+        self.local = m * n > 25
+        self.neighbors = []
+        for p in range(m * n):
+            i, j = divmod(p, n)
+            self.neighbors.append([a * n + b
+                                   for a in range(i - 1, i + 2) for b in range(j - 1, j + 2)
+                                   if 0 <= a < m and 0 <= b < n and (a, b) != (i, j)])
+
+        # Cells closer to the center are tried first
+        center_i, center_j = (m - 1) / 2, (n - 1) / 2
+        self.rank = [abs(p // n - center_i) + abs(p % n - center_j) for p in range(m * n)]
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[ttt.EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        if(self.terminal(board)):
+            return None
+        count_X = sum(row.count(ttt.X) for row in board)
+        count_O = sum(row.count(ttt.O) for row in board)
+        return ttt.O if count_X > count_O else ttt.X
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        if(self.terminal(board)):
+            return None
+        return {(i, j) for i in range(self.m) for j in range(self.n) if board[i][j] == ttt.EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        if(board[action[0]][action[1]] != ttt.EMPTY):
+            raise Exception
+        newboard = [row[:] for row in board]
+        newboard[action[0]][action[1]] = self.player(board)
+        return newboard
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        cells = self.flatten(board)
+        for line in self.lines:
+            first = cells[line[0]]
+            if(first != ttt.EMPTY and all(cells[p] == first for p in line)):
+                return first
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return self.winner(board) is not None or all(val != ttt.EMPTY for row in board for val in row)
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        w = self.winner(board)
+        return 1 if w == ttt.X else -1 if w == ttt.O else 0
+
+    def flatten(self, board):
+        """
+        Returns the cells of board as a flat list, row by row.
+        """
+        return [val for row in board for val in row]
+
+    def evaluate(self, board):
+        """
+        Returns a heuristic score of a position from X's point of view.
+        Every window still open to only one player scores 4 ** stones.
+        """
+        return Position(self, board).score
+
+    def search(self, board, time_limit=None, node_limit=None, max_depth=None):
+        """
+        Returns a SearchResult with the best action found for the current
+        player on the board.
+
+        Searches one ply deeper per iteration until the game tree is
+        exhausted, max_depth is reached, or time_limit seconds / node_limit
+        nodes have been spent. value is from the point of view of the player
+        to move; complete is True if the value is exact.
+        """
+        if(self.terminal(board)):
+            return SearchResult(None, 0, 0, 0, True)
+        position = Position(self, board)
+        sign = 1 if position.moves % 2 == 0 else -1
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        if(max_depth is None):
+            max_depth = self.m * self.n - position.moves
+
+        self.nodes = 0
+        self.budget = (deadline, node_limit)
+        self.stats.start()
+        moves = position.candidates()
+        best = SearchResult((moves[0] // self.n, moves[0] % self.n), 0, 0, 0, False)
+        for depth in range(1, max_depth + 1):
+            self.cut = False # Set when a branch is cut off by depth
+            started, nodes = time.perf_counter(), self.nodes
+            try:
+                value, move, scores = self.root(position, moves, depth, sign)
+            except SearchTimeout:
+                break
+            finally:
+                self.stats.depth_times[depth] += time.perf_counter() - started
+                self.stats.depth_nodes[depth] += self.nodes - nodes
+            best = SearchResult((move // self.n, move % self.n), value, depth, self.nodes, not self.cut)
+            if(not self.cut or abs(value) >= WIN - self.m * self.n):
+                break # Exact result (or forced win/loss) found
+            # Try the best moves of this iteration first in the next one
+            moves.sort(key=lambda p: -scores[p])
+        self.stats.stop()
+        self.stats.nodes += self.nodes
+        return best._replace(nodes=self.nodes)
+
+    def root(self, position, moves, depth, sign):
+        """
+        Searches every root move to depth; returns the best value, the best
+        move and the score of every move.
+        """
+        player = ttt.X if sign == 1 else ttt.O
+        alpha, beta = -math.inf, math.inf
+        best_move, scores = moves[0], {}
+        for p in moves:
+            try:
+                if(position.place(p, player)):
+                    score = WIN - 1
+                else:
+                    score = -self.negamax(position, depth - 1, 2, -beta, -alpha, -sign)
+            finally:
+                position.remove(p)
+            scores[p] = score
+            if(score > alpha):
+                alpha, best_move = score, p
+        return alpha, best_move, scores
+
+    def negamax(self, position, depth, ply, alpha, beta, sign):
+        """
+        Returns the alpha-beta value of a position from the point of view of
+        the player to move (sign is 1 for X, -1 for O).
+        """
+        self.nodes += 1
+        deadline, node_limit = self.budget
+        if((node_limit is not None and self.nodes >= node_limit) or
+           (deadline is not None and self.nodes % 256 == 0 and time.perf_counter() >= deadline)):
+            raise SearchTimeout
+        if(position.moves == len(position.cells)):
+            return 0 # Draw
+        if(depth == 0):
+            self.cut = True
+            return sign * position.score
+        player = ttt.X if sign == 1 else ttt.O
+        value = -math.inf
+        for p in position.candidates():
+            try:
+                if(position.place(p, player)):
+                    score = WIN - ply
+                else:
+                    score = -self.negamax(position, depth - 1, ply + 1, -beta, -alpha, -sign)
+            finally:
+                position.remove(p)
+            if(score > value):
+                value = score
+            if(value > alpha):
+                alpha = value
+            if(alpha >= beta):
+                self.stats.cutoffs += 1
+                break
+        return value
+
+
+class Position():
+    """
+    Mutable position used by Game.search(). place() and remove() keep the
+    stone count of every window, the heuristic score and the number of
+    stones next to every cell up to date, so no board is copied or rescanned.
+    """
+
+    def __init__(self, game, board):
+        self.game = game
+        self.cells = [ttt.EMPTY] * (game.m * game.n)
+        self.count = {ttt.X: [0] * len(game.lines), ttt.O: [0] * len(game.lines)}
+        self.near = [0] * (game.m * game.n)
+        self.weight = [0] + [4 ** s for s in range(1, game.k + 1)]
+        self.score = 0
+        self.moves = 0
+        for p, val in enumerate(game.flatten(board)):
+            if(val != ttt.EMPTY):
+                self.place(p, val)
+
+    def line_score(self, line):
+        """
+        Returns the heuristic score of a window from X's point of view.
+        """
+        count_X, count_O = self.count[ttt.X][line], self.count[ttt.O][line]
+        if(count_O == 0):
+            return self.weight[count_X]
+        if(count_X == 0):
+            return -self.weight[count_O]
+        return 0
+
+    def place(self, p, player):
+        """
+        Puts a stone of player on cell p; returns True if it completes a line.
+        """
+        self.cells[p] = player
+        self.moves += 1
+        count, won = self.count[player], False
+        for line in self.game.lines_through[p]:
+            before = self.line_score(line)
+            count[line] += 1
+            self.score += self.line_score(line) - before
+            if(count[line] == self.game.k):
+                won = True
+        for q in self.game.neighbors[p]:
+            self.near[q] += 1
+        return won
+
+    def remove(self, p):
+        """
+        Takes the stone off cell p.
+        """
+        count = self.count[self.cells[p]]
+        self.cells[p] = ttt.EMPTY
+        self.moves -= 1
+        for line in self.game.lines_through[p]:
+            before = self.line_score(line)
+            count[line] -= 1
+            self.score += self.line_score(line) - before
+        for q in self.game.neighbors[p]:
+            self.near[q] -= 1
+
+    def candidates(self):
+        """
+        Returns the flat indexes of the moves to search, best guesses first.
+        On large boards only cells next to a stone are considered.
+        """
+        cells, near = self.cells, self.near
+        empty = [p for p in range(len(cells)) if cells[p] == ttt.EMPTY]
+        if(self.game.local and self.moves):
+            empty = [p for p in empty if near[p]] or empty
+        empty.sort(key=self.game.rank.__getitem__)
+        return empty
@@ -1,25 +1,184 @@
 import pygame
+import queue
 import sys
+import threading
 import time
+from concurrent.futures import Future
 
 import tictactoe as ttt
 
 pygame.init()
 size = width, height = 600, 400
+FPS = 30
 
 # Colors
 black = (0, 0, 0)
 white = (255, 255, 255)
 
 screen = pygame.display.set_mode(size)
+clock = pygame.time.Clock()
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+# Rendered text surfaces, keyed by (font, text, color)
+glyphs = {}
+
+
+def render(font, text, color):
+    """
+    Returns the surface of text, rendering it only the first time.
+    """
+    key = (font, text, color)
+    if key not in glyphs:
+        glyphs[key] = font.render(text, True, color)
+    return glyphs[key]
+
+
+def make_button(rect, text):
+    """
+    Returns a surface the size of rect showing a white button labelled text.
+    """
+    surface = pygame.Surface(rect.size)
+    surface.fill(white)
+    label = render(mediumFont, text, black)
+    surface.blit(label, label.get_rect(center=(rect.width / 2, rect.height / 2)))
+    return surface
+
+
+# Static layout
+playXButton = pygame.Rect((width / 8), (height / 2), width / 4, 50)
+playOButton = pygame.Rect(5 * (width / 8), (height / 2), width / 4, 50)
+againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
+buttons = {
+    "Play as X": make_button(playXButton, "Play as X"),
+    "Play as O": make_button(playOButton, "Play as O"),
+    "Play Again": make_button(againButton, "Play Again")
+}
+menuTitleRect = pygame.Rect(0, 20, width, 60)
+titleRect = pygame.Rect(0, 0, width, 60)
+
+tile_size = 80
+tile_origin = (width / 2 - (1.5 * tile_size),
+               height / 2 - (1.5 * tile_size))
+tiles = [[pygame.Rect(tile_origin[0] + j * tile_size,
+                      tile_origin[1] + i * tile_size,
+                      tile_size, tile_size)
+          for j in range(3)] for i in range(3)]
+
+# What each region of the screen currently shows, and the rects to update this frame
+drawn = {}
+dirty = []
+
+
+def draw(region, rect, content, paint):
+    """
+    Repaints rect with paint() if the region should now show something
+    other than what it shows.
+    """
+    if region in drawn and drawn[region] == content:
+        return
+    screen.fill(black, rect)
+    paint()
+    drawn[region] = content
+    dirty.append(rect)
+
+
+def show_screen(name):
+    """
+    Clears the window when switching between the menu and the game.
+    """
+    if drawn.get("screen") != name:
+        drawn.clear()
+        drawn["screen"] = name
+        screen.fill(black)
+        dirty.append(screen.get_rect())
+
+
+def paint_text(rect, text, font, color=white):
+    """
+    Draws text centered in rect.
+    """
+    surface = render(font, text, color)
+    screen.blit(surface, surface.get_rect(center=rect.center))
+
+
+def paint_tile(rect, value):
+    """
+    Draws a tile of the board with its mark, if any.
+    """
+    pygame.draw.rect(screen, white, rect, 3)
+    if value != ttt.EMPTY:
+        paint_text(rect, value, moveFont)
+
+
+class Worker():
+    """
+    Runs calls in order on a daemon thread of its own.
+
+    A call that is running can not be stopped. cancel() drops the calls
+    that have not started and lets the thread end after the one in hand,
+    whose result is then ignored. A new Worker starts at once on a fresh
+    thread instead of waiting behind it, and daemon threads do not hold
+    up quitting.
+    """
+
+    def __init__(self):
+        self.calls = queue.SimpleQueue()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def submit(self, function, *args):
+        """
+        Queues function(*args) and returns a Future for its result.
+        """
+        future = Future()
+        self.calls.put((future, function, args))
+        return future
+
+    def run(self):
+        while True:
+            call = self.calls.get()
+            if call is None: # Cancelled
+                return
+            future, function, args = call
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(function(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+    def cancel(self, futures=()):
+        """
+        Cancels futures that have not started, and ends the thread once
+        the call it is running, if any, returns.
+        """
+        for future in futures:
+            future.cancel()
+        self.calls.put(None)
+
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
+
+# The AI move is computed on a worker thread so the window keeps drawing
+worker = Worker()
+ai_move = None
+ai_started = None
+
+
+def cancel_ai_move():
+    """
+    Discards the AI move being computed, if any. A search that is already
+    running is left to finish on the old worker, and its move is ignored.
+    """
+    global ai_move, worker
+    if ai_move is not None:
+        worker.cancel([ai_move])
+        worker = Worker()
+        ai_move = None
+
 
 while True:
 
@@ -27,31 +186,17 @@ while True:
         if event.type == pygame.QUIT:
             sys.exit()
 
-    screen.fill(black)
-
     # Let user choose a player.
     if user is None:
+        show_screen("menu")
 
         # Draw title
-        title = largeFont.render("Play Tic-Tac-Toe", True, white)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 50)
-        screen.blit(title, titleRect)
+        draw("title", menuTitleRect, "Play Tic-Tac-Toe",
+             lambda: paint_text(menuTitleRect, "Play Tic-Tac-Toe", largeFont))
 
         # Draw buttons
-        playXButton = pygame.Rect((width / 8), (height / 2), width / 4, 50)
-        playX = mediumFont.render("Play as X", True, black)
-        playXRect = playX.get_rect()
-        playXRect.center = playXButton.center
-        pygame.draw.rect(screen, white, playXButton)
-        screen.blit(playX, playXRect)
-
-        playOButton = pygame.Rect(5 * (width / 8), (height / 2), width / 4, 50)
-        playO = mediumFont.render("Play as O", True, black)
-        playORect = playO.get_rect()
-        playORect.center = playOButton.center
-        pygame.draw.rect(screen, white, playOButton)
-        screen.blit(playO, playORect)
+        draw("playX", playXButton, True, lambda: screen.blit(buttons["Play as X"], playXButton))
+        draw("playO", playOButton, True, lambda: screen.blit(buttons["Play as O"], playOButton))
 
         # Check if button is clicked
         click, _, _ = pygame.mouse.get_pressed()
@@ -65,29 +210,13 @@ while True:
                 user = ttt.O
 
     else:
+        show_screen("game")
 
-        # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
-        tiles = []
+        # Draw game board, only the tiles that changed
         for i in range(3):
-            row = []
             for j in range(3):
-                rect = pygame.Rect(
-                    tile_origin[0] + j * tile_size,
-                    tile_origin[1] + i * tile_size,
-                    tile_size, tile_size
-                )
-                pygame.draw.rect(screen, white, rect, 3)
-
-                if board[i][j] != ttt.EMPTY:
-                    move = moveFont.render(board[i][j], True, white)
-                    moveRect = move.get_rect()
-                    moveRect.center = rect.center
-                    screen.blit(move, moveRect)
-                row.append(rect)
-            tiles.append(row)
+                draw((i, j), tiles[i][j], board[i][j],
+                     lambda rect=tiles[i][j], value=board[i][j]: paint_tile(rect, value))
 
         game_over = ttt.terminal(board)
         player = ttt.player(board)
@@ -102,21 +231,18 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
-        title = largeFont.render(title, True, white)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 30)
-        screen.blit(title, titleRect)
+            dots = "." * (int(time.time() * 3) % 4)
+            title = f"Computer thinking{dots:<3}"
+        draw("title", titleRect, title, lambda: paint_text(titleRect, title, largeFont))
 
-        # Check for AI move
+        # Check for AI move, shown no sooner than half a second after it was asked for
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                ai_move = worker.submit(ttt.minimax, board)
+                ai_started = time.time()
+            elif ai_move.done() and time.time() - ai_started >= 0.5:
+                board = ttt.result(board, ai_move.result())
+                ai_move = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -127,13 +253,9 @@ while True:
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
+        draw("again", againButton, game_over,
+             lambda: game_over and screen.blit(buttons["Play Again"], againButton))
         if game_over:
-            againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
-            againRect = again.get_rect()
-            againRect.center = againButton.center
-            pygame.draw.rect(screen, white, againButton)
-            screen.blit(again, againRect)
             click, _, _ = pygame.mouse.get_pressed()
             if click == 1:
                 mouse = pygame.mouse.get_pos()
@@ -141,6 +263,10 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    cancel_ai_move()
 
-    pygame.display.flip()
+    # Update only the parts of the window that changed, at most FPS times a second
+    if dirty:
+        pygame.display.update(dirty)
+        dirty.clear()
+    clock.tick(FPS)
@@ -3,12 +3,448 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
+import time
+import pickle
+import cProfile
+import io
+import pstats
+import multiprocessing
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Kinds of values stored in the transposition table
+EXACT = 0
+LOWER = 1 # The true value is at least the stored value
+UPPER = 2 # The true value is at most the stored value
+
+# Static move preference: center first, then corners, then edges
+MOVE_RANK = {(1, 1): 0,
+             (0, 0): 1, (0, 2): 1, (2, 0): 1, (2, 2): 1,
+             (0, 1): 2, (1, 0): 2, (1, 2): 2, (2, 1): 2}
+
+# The 8 isometries of the board (dihedral group D4), mapping cell (i, j) to its image
+SYMMETRIES = [lambda i, j: (i, j),         # identity
+              lambda i, j: (j, 2 - i),     # rotate 90
+              lambda i, j: (2 - i, 2 - j), # rotate 180
+              lambda i, j: (2 - j, i),     # rotate 270
+              lambda i, j: (i, 2 - j),     # reflect columns
+              lambda i, j: (2 - i, j),     # reflect rows
+              lambda i, j: (j, i),         # reflect main diagonal
+              lambda i, j: (2 - j, 2 - i)] # reflect anti-diagonal
+INVERSE = [0, 3, 2, 1, 4, 5, 6, 7]
+
+# For every isometry, the source cell of each cell of the image, row by row
+SOURCES = [[SYMMETRIES[INVERSE[t]](i, j) for i in range(3) for j in range(3)] for t in range(8)]
+
+# Cells as flat indexes 3 * i + j: all actions, the 3 rows, 3 cols and
+# 2 diagonals, and the lines through each cell
+ACTIONS = [(i, j) for i in range(3) for j in range(3)]
+LINES = [(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)]
+LINES_THROUGH = [[line for line in LINES if index in line] for index in range(9)]
+
+# KEY_WEIGHTS[t][index] is the weight of a cell in the board_key() of image t
+KEY_WEIGHTS = [[3 ** (8 - SOURCES[t].index(ACTIONS[index])) for index in range(9)] for t in range(8)]
+DIGIT = {EMPTY: 0, X: 1, O: 2}
+
+
+class SearchStats():
+    """
+    Counters describing the work done by the search: nodes visited in total
+    and per depth (number of moves on the board, or iteration of an
+    iterative deepening search), alpha-beta cutoffs, transposition table
+    hits and misses, and time spent.
+
+    If profile is True, every search also runs under cProfile; see
+    profile_report().
+    """
+
+    def __init__(self, profile=False):
+        self.profiler = cProfile.Profile() if profile else None
+        self.reset()
+
+    def reset(self):
+        """
+        Sets all counters to zero and discards profiling data.
+        """
+        self.searches = 0
+        self.nodes = 0
+        self.cutoffs = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.elapsed = 0.0
+        self.depth_nodes = Counter()
+        self.depth_times = Counter()
+        self.started = None
+        if(self.profiler is not None):
+            self.profiler = cProfile.Profile()
+
+    def start(self, table=None):
+        """
+        Called when a search starts; table is the transposition table it uses.
+        """
+        self.searches += 1
+        self.started = (time.perf_counter(), table.hits if table else 0, table.misses if table else 0)
+        if(self.profiler is not None):
+            self.profiler.enable()
+
+    def stop(self, table=None):
+        """
+        Called when a search ends.
+        """
+        if(self.profiler is not None):
+            self.profiler.disable()
+        started, hits, misses = self.started
+        self.elapsed += time.perf_counter() - started
+        if(table):
+            self.cache_hits += table.hits - hits
+            self.cache_misses += table.misses - misses
+
+    def merge(self, other):
+        """
+        Adds the counters of another SearchStats to this one.
+        """
+        self.searches += other.searches
+        self.nodes += other.nodes
+        self.cutoffs += other.cutoffs
+        self.cache_hits += other.cache_hits
+        self.cache_misses += other.cache_misses
+        self.elapsed += other.elapsed
+        self.depth_nodes.update(other.depth_nodes)
+        self.depth_times.update(other.depth_times)
+
+    def as_dict(self):
+        """
+        Returns the counters as a dict that can be written as JSON.
+        """
+        return {"searches": self.searches, "nodes": self.nodes, "cutoffs": self.cutoffs,
+                "cache_hits": self.cache_hits, "cache_misses": self.cache_misses,
+                "elapsed": self.elapsed,
+                "nodes_per_second": self.nodes / self.elapsed if self.elapsed else 0.0,
+                "depth_nodes": {str(depth): n for depth, n in sorted(self.depth_nodes.items())},
+                "depth_times": {str(depth): t for depth, t in sorted(self.depth_times.items())}}
+
+    def profile_report(self, limit=20, sort="cumulative"):
+        """
+        Returns the cProfile report of the profiled searches as a string.
+        """
+        if(self.profiler is None):
+            return ""
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+class MoveOrdering():
+    """
+    Orders moves for alpha-beta search.
+
+    Moves are tried killer moves first (moves that recently caused a cutoff
+    at the same depth), then by history score (how often a move caused a
+    cutoff anywhere), then by MOVE_RANK: center, corners, edges.
+    """
+
+    def __init__(self, killers=True, history=True):
+        self.killers = {} if killers else None
+        self.history = {} if history else None
+
+    def order(self, state, moves, depth):
+        """
+        Returns moves as a list, best candidates first.
+        """
+        killers = self.killers.get(depth, ()) if self.killers is not None else ()
+        history = self.history if self.history is not None else {}
+        return sorted(moves, key=lambda move: (move not in killers,
+                                               -history.get(move, 0),
+                                               MOVE_RANK.get(move, 3)))
+
+    def cutoff(self, move, depth):
+        """
+        Records that move caused a cutoff at depth.
+        """
+        if(self.killers is not None):
+            killers = self.killers.setdefault(depth, [])
+            if(move not in killers):
+                killers.insert(0, move)
+                del killers[2:] # Keep the two most recent killers
+        if(self.history is not None):
+            self.history[move] = self.history.get(move, 0) + depth * depth
+
+
+class TranspositionTable():
+    """
+    Cache of solved positions, keyed by board_key(board).
+
+    If maxsize is given the table is bounded and the least recently used
+    entries are evicted first. The table can be saved to and loaded from a
+    file so that other processes can start from a warm cache.
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        """
+        Returns the cached value for key, or None if it is not cached.
+        """
+        value = self.entries.get(key)
+        if(value is None):
+            self.misses += 1
+            return None
+        self.hits += 1
+        if(self.maxsize is not None):
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """
+        Stores value for key, evicting old entries if the table is full.
+        """
+        self.entries[key] = value
+        if(self.maxsize is not None):
+            self.entries.move_to_end(key)
+            while(len(self.entries) > self.maxsize):
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all entries and resets the hit/miss counters.
+        """
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """
+        Returns a dict with the size of the table and its hit/miss counters.
+        """
+        return {"size": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+    def save(self, filename):
+        """
+        Writes all entries to filename.
+        """
+        with open(filename, "wb") as f:
+            pickle.dump(dict(self.entries), f)
+
+    def load(self, filename):
+        """
+        Adds the entries stored in filename to the table.
+        """
+        with open(filename, "rb") as f:
+            for key, value in pickle.load(f).items():
+                self.put(key, value)
+
+
+class GameState():
+    """
+    Mutable Tic Tac Toe position for the search.
+
+    push(action) plays a move and pop() takes back the last one. Both update
+    the move count, the player to move, the winner and the board keys in
+    place, so searching never copies or rescans the board.
+    """
+
+    def __init__(self, board=None):
+        self.cells = [EMPTY] * 9
+        self.moves = 0
+        self.history = []
+        self.won = None
+        self.keys = None # board_key() of the 8 images, computed on first use
+        count_X, count_O = 0, 0
+        if(board is not None):
+            for index in range(9):
+                val = board[index // 3][index % 3]
+                self.cells[index] = val
+                if(val == X):
+                    count_X += 1
+                elif(val == O):
+                    count_O += 1
+            self.moves = count_X + count_O
+            for a, b, c in LINES:
+                if(self.cells[a] == self.cells[b] == self.cells[c] and self.cells[a] != EMPTY):
+                    self.won = self.cells[a]
+                    break
+        self.turn = O if count_X > count_O else X
+
+    def board(self):
+        """
+        Returns the position as a list of lists board.
+        """
+        return [self.cells[0:3], self.cells[3:6], self.cells[6:9]]
+
+    def terminal(self):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return self.won is not None or self.moves == 9
+
+    def player(self):
+        """
+        Returns player who has the next turn, or None if the game is over.
+        """
+        return None if self.terminal() else self.turn
+
+    def utility(self):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        return 1 if self.won == X else -1 if self.won == O else 0
+
+    def actions(self):
+        """
+        Returns the list of empty cells (i, j), row by row.
+        """
+        cells = self.cells
+        return [action for index, action in enumerate(ACTIONS) if cells[index] == EMPTY]
+
+    def unique_actions(self):
+        """
+        Returns a list with one action (i, j) from each set of actions whose
+        results are rotations or reflections of each other.
+        """
+        keys = self.key_list()
+        stabilizer = [t for t in range(1, 8) if keys[t] == keys[0]]
+        if(not stabilizer):
+            return self.actions()
+        seen, unique = set(), []
+        for action in self.actions():
+            if(action in seen):
+                continue
+            unique.append(action)
+            for t in stabilizer:
+                seen.add(SYMMETRIES[t](*action))
+        return unique
+
+    def key_list(self):
+        """
+        Returns the board_key() of each of the 8 images of the position.
+        """
+        if(self.keys is None):
+            self.keys = [sum(KEY_WEIGHTS[t][index] * DIGIT[self.cells[index]] for index in range(9))
+                         for t in range(8)]
+        return self.keys
+
+    def key(self, symmetry=False):
+        """
+        Returns board_key() of the position, or its canonical key if symmetry.
+        """
+        keys = self.key_list()
+        if(not symmetry):
+            return keys[0]
+        key = keys[0]
+        for k in keys:
+            if(k < key):
+                key = k
+        return key
+
+    def push(self, action):
+        """
+        Plays action (i, j) for the player to move.
+        """
+        index = 3 * action[0] + action[1]
+        if(self.cells[index] != EMPTY or self.won is not None):
+            raise Exception
+        p = self.turn
+        self.cells[index] = p
+        self.moves += 1
+        self.history.append(index)
+        if(self.keys is not None):
+            digit = DIGIT[p]
+            for t in range(8):
+                self.keys[t] += KEY_WEIGHTS[t][index] * digit
+        for a, b, c in LINES_THROUGH[index]:
+            if(self.cells[a] == self.cells[b] == self.cells[c]):
+                self.won = p
+                break
+        self.turn = O if p == X else X
+
+    def pop(self):
+        """
+        Takes back the last move played with push().
+        """
+        index = self.history.pop()
+        p = self.cells[index]
+        self.cells[index] = EMPTY
+        self.moves -= 1
+        if(self.keys is not None):
+            digit = DIGIT[p]
+            for t in range(8):
+                self.keys[t] -= KEY_WEIGHTS[t][index] * digit
+        self.won = None # push() is not allowed once the game is won
+        self.turn = p
+
+
+# Shared by every call to minimax() in this process
+transposition = TranspositionTable()
+
+# Work done by the search since the last stats.reset()
+stats = SearchStats()
+
+
+def board_key(board):
+    """
+    Returns a hashable encoding of the board: the cells read row by row
+    as the digits of a base 3 number (EMPTY = 0, X = 1, O = 2).
+    """
+    key = 0
+    for row in board:
+        for val in row:
+            key = 3 * key + (0 if val == EMPTY else 1 if val == X else 2)
+    return key
+
+
+def transform(board, t):
+    """
+    Returns the image of the board under isometry SYMMETRIES[t].
+    """
+    newboard = initial_state()
+    for i in range(3):
+        for j in range(3):
+            a, b = SYMMETRIES[t](i, j)
+            newboard[a][b] = board[i][j]
+    return newboard
+
+
+def canonical(board):
+    """
+    Returns (key, t): the smallest board_key() among the 8 images of the board,
+    and the isometry SYMMETRIES[t] that maps the board to that image.
+    Boards that are rotations or reflections of each other share the key.
+    """
+    best = None
+    for t in range(8):
+        key = 0
+        for i, j in SOURCES[t]:
+            val = board[i][j]
+            key = 3 * key + (0 if val == EMPTY else 1 if val == X else 2)
+        if(best is None or key < best[0]):
+            best = (key, t)
+    return best
+
+
+def unique_actions(board):
+    """
+    Returns a list with one action (i, j) from each set of actions whose
+    results are rotations or reflections of each other.
+    """
+    state = GameState(board)
+    if(state.terminal()):
+        return None
+    return state.unique_actions()
+
 
 def initial_state():
     """
@@ -23,36 +459,17 @@ def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    if(board == initial_state()): # Game is in the initial state
-        return X
-    if(terminal(board)): # Game is over
-        return None
-    # Count the number of "X" and the number of "O": if count_X > count_O return "O" else return "X"
-    count_X, count_O = 0, 0
-    for row in board:
-        for val in row:
-            if(val == "X"):
-                count_X += 1
-            elif(val == "O"):
-                count_O += 1
-    if(count_X > count_O):
-        return O
-    return X
+    return GameState(board).player()
 
 
 def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    if(terminal(board)): # Game is over
+    state = GameState(board)
+    if(state.terminal()): # Game is over
         return None
-    # Find all coordinates on the board that are None, and return a set of those coordinates
-    actions = set()
-    for i in range(len(board)):
-        for j in range(len(board[0])):
-            if(board[i][j] == None):
-                actions.add((i,j))
-    return actions
+    return set(state.actions())
 
 
 def result(board, action):
@@ -62,7 +479,7 @@ def result(board, action):
     p = player(board) # Either "X" or "O"
     if(board[action[0]][action[1]] != None):
         raise Exception
-    newboard = copy.deepcopy(board)
+    newboard = [row[:] for row in board]
     newboard[action[0]][action[1]] = p
     return newboard
 
@@ -71,74 +488,197 @@ def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    # 3 rows, 3 cols, 2 diagonals
-    coord_matrix = [[(0,0), (0,1), (0,2)], # row0
-                    [(1,0), (1,1), (1,2)], # row1
-                    [(2,0), (2,1), (2,2)], # row2
-                    [(0,0), (1,0), (2,0)], # col0
-                    [(0,1), (1,1), (2,1)], # col1
-                    [(0,2), (1,2), (2,2)], # col2
-                    [(0,0), (1,1), (2,2)], # diag0
-                    [(0,2), (1,1), (2,0)]] # diag1
-    for coord0, coord1, coord2 in coord_matrix:
-        if(board[coord0[0]][coord0[1]] == board[coord1[0]][coord1[1]] == board[coord2[0]][coord2[1]] and board[coord0[0]][coord0[1]] != None):
-            return board[coord0[0]][coord0[1]]
-    return None
+    return GameState(board).won
 
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    flag_None = 0
-    for row in board:
-        for val in row:
-            if(val == None):
-                flag_None = 1 # If flag = 1 -> result is pending, not draw
-    w = winner(board)
-    if(w != None or (w == None and flag_None == 0)): # someone already won or it is a Draw (no more moves to make)
-        return True
-    return False
+    return GameState(board).terminal()
 
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    w = winner(board)
-    if(w == X):
-        return 1
-    elif(w == O):
-        return -1
-    else:
-        return 0
+    return GameState(board).utility()
 
 
-def minimax(board):
+def minimax(board, alphabeta=False, ordering=None, book=True, symmetry=False, workers=None):
     """
     Returns the optimal action for the current player on the board.
+
+    If book is True the precomputed solution table (see book.py) is
+    consulted first and no search is done for positions it contains.
+    If alphabeta is True, branches that cannot change the result are pruned.
+    ordering is the MoveOrdering used below the root (a fresh one if None).
+    Root moves are always tried in the order of actions(board), so all
+    modes return the same action.
+
+    If symmetry is True, positions that are rotations or reflections of each
+    other are searched once. The search runs on the canonical image of the
+    board and the action is mapped back, so it is optimal but may differ
+    from the other modes.
+
+    If workers is given, the root moves are searched in parallel by that
+    many processes (see root_values()); the action is the same as serially.
+
+    The work done is added to stats.
+    """
+    stats.start(transposition)
+    try:
+        return root_search(board, alphabeta, ordering, book, symmetry, workers)
+    finally:
+        stats.stop(transposition)
+
+
+def root_search(board, alphabeta, ordering, book, symmetry, workers):
+    """
+    Returns the action chosen by minimax().
     """
     if(terminal(board)): # Game is over
         return None
-    p = player(board) # X is max player, O is min player
+    if(book):
+        import book as solutions # book imports this module
+        entry = solutions.lookup(board)
+        if(entry is not None):
+            return entry[1]
+    if(alphabeta and ordering is None):
+        ordering = MoveOrdering()
+    if(symmetry): # Search the canonical image of the board
+        t = canonical(board)[1]
+        board = transform(board, t)
+    state = GameState(board)
+    p = state.player() # X is max player, O is min player
+    moves = state.unique_actions() if symmetry else list(actions(board))
+    if(workers):
+        values = root_values(board, moves, alphabeta, symmetry, workers)
     action_to_return = None
     if (p == X):
         value = -math.inf
-        for action in actions(board):
-            val = min_value(result(board, action))
+        for index, action in enumerate(moves):
+            if(workers):
+                val = values[index]
+            else:
+                state.push(action)
+                if(alphabeta):
+                    # Only a strictly better move matters, so value is the lower bound
+                    val = ab_min_state_value(state, value, math.inf, ordering, symmetry)
+                else:
+                    val = min_state_value(state, symmetry)
+                state.pop()
             if(val > value):
                 value = val
                 action_to_return = action
+            if(alphabeta and value >= 1): # Can not do better than a win
+                break
     else:
         value = math.inf
-        for action in actions(board):
-            val = max_value(result(board, action))
+        for index, action in enumerate(moves):
+            if(workers):
+                val = values[index]
+            else:
+                state.push(action)
+                if(alphabeta):
+                    val = ab_max_state_value(state, -math.inf, value, ordering, symmetry)
+                else:
+                    val = max_state_value(state, symmetry)
+                state.pop()
             if(val < value):
                 value = val
                 action_to_return = action
+            if(alphabeta and value <= -1):
+                break
+    if(symmetry): # Map the action back to the caller's orientation
+        return SYMMETRIES[INVERSE[t]](*action_to_return)
     return action_to_return
 
 
+def move_scores(board, symmetry=True):
+    """
+    Returns a dict mapping every action to the minimax value of the board
+    that results from it, or an empty dict if the game is over.
+    """
+    state = GameState(board)
+    if(state.terminal()):
+        return {}
+    search = min_state_value if state.player() == X else max_state_value
+    scores = {}
+    for action in actions(board):
+        state.push(action)
+        scores[action] = search(state, symmetry)
+        state.pop()
+    return scores
+
+
+# Values of the root moves found so far by the processes of root_values()
+shared_values = None
+
+
+def root_values(board, moves, alphabeta, symmetry, workers):
+    """
+    Returns the values of the root moves, searched by a pool of workers
+    processes.
+
+    Each finished value is published in a shared array. With alphabeta, a
+    move is searched with the best finished value of the moves before it
+    as its bound. Such a move can only be chosen if it beats every earlier
+    move, so a bound-limited value never changes the chosen action.
+    """
+    values = multiprocessing.Array("d", [math.nan] * len(moves))
+    with ProcessPoolExecutor(max_workers=workers, initializer=share_values, initargs=(values,)) as executor:
+        futures = [executor.submit(search_root_move, board, moves, index, alphabeta, symmetry)
+                   for index in range(len(moves))]
+        return [future.result() for future in futures]
+
+
+def share_values(values):
+    """
+    Initializer of the root_values() worker processes.
+    """
+    global shared_values
+    shared_values = values
+
+
+def search_root_move(board, moves, index, alphabeta, symmetry):
+    """
+    Returns the value of root move moves[index], run in a worker process.
+    """
+    state = GameState(board)
+    maximize = state.player() == X
+    state.push(moves[index])
+    if(not alphabeta):
+        val = min_state_value(state, symmetry) if maximize else max_state_value(state, symmetry)
+    else:
+        finished = [v for v in shared_values[:index] if not math.isnan(v)]
+        if(maximize):
+            bound = -math.inf
+            for v in finished:
+                bound = max(bound, v)
+            val = ab_min_state_value(state, bound, math.inf, MoveOrdering(), symmetry)
+        else:
+            bound = math.inf
+            for v in finished:
+                bound = min(bound, v)
+            val = ab_max_state_value(state, -math.inf, bound, MoveOrdering(), symmetry)
+    shared_values[index] = val
+    return val
+
+
+def anytime_minimax(board, k=3, time_limit=None, node_limit=None):
+    """
+    Returns the best action found for the current player on an m x n board
+    where k in a row wins, searching deeper until time_limit seconds or
+    node_limit nodes have been spent. With no limits the search is exact.
+    """
+    import mnk # mnk imports this module
+    game = mnk.Game(len(board), len(board[0]), k)
+    action = game.search(board, time_limit=time_limit, node_limit=node_limit).action
+    stats.merge(game.stats)
+    return action
+
+
 def min(x, y):
     '''
     Returns the minimum value.
@@ -153,25 +693,166 @@ def max(x, y):
     return x if x > y else y
 
 
-def max_value(board):
+def max_value(board, symmetry=False):
+    '''
+    Helper Function for minimax().
+    '''
+    return max_state_value(GameState(board), symmetry)
+
+
+def min_value(board, symmetry=False):
     '''
     Helper Function for minimax().
     '''
-    if(terminal(board)):
-        return utility(board)
+    return min_state_value(GameState(board), symmetry)
+
+
+def ab_max_value(board, alpha, beta, ordering, symmetry=False):
+    '''
+    Alpha-beta version of max_value().
+    '''
+    return ab_max_state_value(GameState(board), alpha, beta, ordering, symmetry)
+
+
+def ab_min_value(board, alpha, beta, ordering, symmetry=False):
+    '''
+    Alpha-beta version of min_value().
+    '''
+    return ab_min_state_value(GameState(board), alpha, beta, ordering, symmetry)
+
+
+def search_actions(state, symmetry):
+    '''
+    Returns the actions to search from state.
+    '''
+    return state.unique_actions() if symmetry else state.actions()
+
+
+def max_state_value(state, symmetry=False):
+    '''
+    Returns the minimax value of state, X to move.
+    With symmetry, positions are cached and searched by canonical key.
+    '''
+    stats.nodes += 1
+    stats.depth_nodes[state.moves] += 1
+    key = state.key(symmetry)
+    entry = transposition.get(key)
+    if(entry is not None and entry[1] == EXACT): # Position already solved
+        return entry[0]
+    if(state.terminal()):
+        value = state.utility()
+    else:
+        value = -math.inf
+        for action in search_actions(state, symmetry):
+            state.push(action)
+            value = max(value, min_state_value(state, symmetry))
+            state.pop()
+    transposition.put(key, (value, EXACT))
+    return value
+
+
+def min_state_value(state, symmetry=False):
+    '''
+    Returns the minimax value of state, O to move.
+    '''
+    stats.nodes += 1
+    stats.depth_nodes[state.moves] += 1
+    key = state.key(symmetry)
+    entry = transposition.get(key)
+    if(entry is not None and entry[1] == EXACT): # Position already solved
+        return entry[0]
+    if(state.terminal()):
+        value = state.utility()
+    else:
+        value = math.inf
+        for action in search_actions(state, symmetry):
+            state.push(action)
+            value = min(value, max_state_value(state, symmetry))
+            state.pop()
+    transposition.put(key, (value, EXACT))
+    return value
+
+
+def probe(key, alpha, beta):
+    '''
+    Returns the cached value of a position if it decides the search
+    within the window (alpha, beta), None otherwise.
+    '''
+    entry = transposition.get(key)
+    if(entry is None):
+        return None
+    value, flag = entry
+    if(flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha)):
+        return value
+    return None
+
+
+def store(key, value, alpha, beta):
+    '''
+    Caches the result of searching a position with the window (alpha, beta).
+    '''
+    if(value <= alpha):
+        flag = UPPER
+    elif(value >= beta):
+        flag = LOWER
+    else:
+        flag = EXACT
+    transposition.put(key, (value, flag))
+
+
+def ab_max_state_value(state, alpha, beta, ordering, symmetry=False):
+    '''
+    Alpha-beta version of max_state_value().
+    '''
+    stats.nodes += 1
+    stats.depth_nodes[state.moves] += 1
+    key = state.key(symmetry)
+    value = probe(key, alpha, beta)
+    if(value is not None):
+        return value
+    if(state.terminal()):
+        value = state.utility()
+        transposition.put(key, (value, EXACT))
+        return value
+    alpha0, depth = alpha, state.moves
     value = -math.inf
-    for action in actions(board):
-        value = max(value, min_value(result(board, action)))
+    for action in ordering.order(state, search_actions(state, symmetry), depth):
+        state.push(action)
+        value = max(value, ab_min_state_value(state, alpha, beta, ordering, symmetry))
+        state.pop()
+        alpha = max(alpha, value)
+        if(alpha >= beta): # Min player will never allow this position
+            stats.cutoffs += 1
+            ordering.cutoff(action, depth)
+            break
+    store(key, value, alpha0, beta)
     return value
 
 
-def min_value(board):
+def ab_min_state_value(state, alpha, beta, ordering, symmetry=False):
     '''
-    Helper Function for minimax().
+    Alpha-beta version of min_state_value().
     '''
-    if(terminal(board)):
-        return utility(board)
+    stats.nodes += 1
+    stats.depth_nodes[state.moves] += 1
+    key = state.key(symmetry)
+    value = probe(key, alpha, beta)
+    if(value is not None):
+        return value
+    if(state.terminal()):
+        value = state.utility()
+        transposition.put(key, (value, EXACT))
+        return value
+    beta0, depth = beta, state.moves
     value = math.inf
-    for action in actions(board):
-        value = min(value, max_value(result(board, action)))
-    return value
\ No newline at end of file
+    for action in ordering.order(state, search_actions(state, symmetry), depth):
+        state.push(action)
+        value = min(value, ab_max_state_value(state, alpha, beta, ordering, symmetry))
+        state.pop()
+        beta = min(beta, value)
+        if(alpha >= beta): # Max player will never allow this position
+            stats.cutoffs += 1
+            ordering.cutoff(action, depth)
+            break
+    store(key, value, alpha, beta0)
+    return value
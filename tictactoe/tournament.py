@@ -0,0 +1,194 @@
+"""
+Headless self-play tournament between engine configurations.
+
+Every pair of engines plays the given number of games with each color.
+Games run in a pool of worker processes and no display is needed. The
+report gives every engine's wins/draws/losses, mean move latency and
+nodes searched per second.
+
+Engines are written as name[:parameter]:
+    random          uniformly random moves
+    minimax         tictactoe.minimax() without the solution table
+    alphabeta       minimax() with alpha-beta pruning
+    symmetry        minimax() with alpha-beta and symmetry reduction
+    book            minimax() with the solution table
+    anytime[:SEC]   mnk iterative deepening, SEC seconds per move (default 0.1)
+    mcts[:N]        Monte Carlo Tree Search, N playouts per move (default 1000)
+Only random, anytime and mcts can play on boards other than 3,3,3.
+
+Usage: python tournament.py ENGINE ENGINE [...] [-g GAMES] [-w WORKERS]
+                            [--board M,N,K] [--openings PLIES] [--json FILE]
+"""
+
+import argparse
+import itertools
+import json
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import tictactoe as ttt
+import mcts
+import mnk
+
+SEARCHES = {
+    "minimax": {"book": False},
+    "alphabeta": {"book": False, "alphabeta": True},
+    "symmetry": {"book": False, "alphabeta": True, "symmetry": True},
+    "book": {},
+}
+
+
+class Engine():
+    """
+    A player built from an engine spec such as "mcts:500". move() returns
+    the chosen action and records its latency and the nodes searched.
+    """
+
+    def __init__(self, spec, game, seed=None):
+        self.spec = spec
+        self.game = game
+        name, _, parameter = spec.partition(":")
+        self.name = name
+        self.random = random.Random(seed)
+        if(name in SEARCHES):
+            if(game is not ttt):
+                raise ValueError(f"{name} only plays on a 3,3,3 board")
+            self.options = SEARCHES[name]
+        elif(name == "anytime"):
+            self.time_limit = float(parameter or 0.1)
+            self.engine = game if game is not ttt else mnk.Game()
+        elif(name == "mcts"):
+            self.playouts = int(parameter or 1000)
+            self.player = mcts.MCTSPlayer(game, playouts=self.playouts, seed=seed)
+        elif(name != "random"):
+            raise ValueError(f"unknown engine {spec!r}")
+        self.latencies = []
+        self.nodes = 0
+
+    def move(self, board):
+        """
+        Returns the action chosen for the current player on the board.
+        """
+        started = time.perf_counter()
+        if(self.name == "random"):
+            action = self.random.choice(sorted(self.game.actions(board)))
+        elif(self.name in SEARCHES):
+            nodes = ttt.stats.nodes
+            action = ttt.minimax(board, **self.options)
+            self.nodes += ttt.stats.nodes - nodes
+        elif(self.name == "anytime"):
+            found = self.engine.search(board, time_limit=self.time_limit)
+            action = found.action
+            self.nodes += found.nodes
+        else:
+            action = self.player.move(board)
+            self.nodes += self.playouts
+        self.latencies.append(time.perf_counter() - started)
+        return action
+
+
+def make_game(size):
+    """
+    Returns the rules for an (m, n, k) board: the tictactoe module for
+    3,3,3 and an mnk.Game otherwise.
+    """
+    return ttt if size == (3, 3, 3) else mnk.Game(*size)
+
+
+def play_game(spec_x, spec_o, size, openings, seed):
+    """
+    Plays one game and returns its utility with the latencies and node
+    counts of both engines. Runs in a worker process.
+    """
+    game = make_game(size)
+    rng = random.Random(seed)
+    engines = {ttt.X: Engine(spec_x, game, rng.randrange(2 ** 32)),
+               ttt.O: Engine(spec_o, game, rng.randrange(2 ** 32))}
+    board = game.initial_state()
+
+    # Random opening moves, so that deterministic engines play different games
+    for _ in range(openings):
+        if(game.terminal(board)):
+            break
+        board = game.result(board, rng.choice(sorted(game.actions(board))))
+
+    while(not game.terminal(board)):
+        board = game.result(board, engines[game.player(board)].move(board))
+    return {"utility": game.utility(board),
+            "engines": {p: {"latencies": engine.latencies, "nodes": engine.nodes}
+                        for p, engine in engines.items()}}
+
+
+def tournament(specs, games=10, size=(3, 3, 3), openings=0, workers=None, seed=0):
+    """
+    Plays every pair of engines games times with each color and returns a
+    dict of results per engine spec.
+    """
+    for spec in specs: # Fail early on bad specs
+        Engine(spec, make_game(size))
+    tasks = [(x, o) for a, b in itertools.combinations(specs, 2)
+             for x, o in [(a, b), (b, a)] for _ in range(games)]
+    seeds = [seed + index for index in range(len(tasks))]
+    results = {spec: {"wins": 0, "draws": 0, "losses": 0, "latencies": [], "nodes": 0} for spec in specs}
+
+    if(workers and workers > 1):
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            played = list(executor.map(play_game, [x for x, _ in tasks], [o for _, o in tasks],
+                                       itertools.repeat(size), itertools.repeat(openings), seeds,
+                                       chunksize=max(1, len(tasks) // (workers * 4))))
+    else:
+        played = [play_game(x, o, size, openings, s) for (x, o), s in zip(tasks, seeds)]
+
+    for (spec_x, spec_o), game in zip(tasks, played):
+        for p, spec, sign in [(ttt.X, spec_x, 1), (ttt.O, spec_o, -1)]:
+            outcome = game["utility"] * sign
+            entry = results[spec]
+            entry["wins" if outcome > 0 else "losses" if outcome < 0 else "draws"] += 1
+            entry["latencies"].extend(game["engines"][p]["latencies"])
+            entry["nodes"] += game["engines"][p]["nodes"]
+
+    report = {}
+    for spec, entry in results.items():
+        thinking = sum(entry["latencies"])
+        report[spec] = {"wins": entry["wins"], "draws": entry["draws"], "losses": entry["losses"],
+                        "moves": len(entry["latencies"]),
+                        "mean_latency": statistics.mean(entry["latencies"]) if entry["latencies"] else 0.0,
+                        "nodes_per_second": entry["nodes"] / thinking if thinking else 0.0}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play a self-play tournament between engines.")
+    parser.add_argument("engines", nargs="+", help="engine specs, e.g. alphabeta mcts:500")
+    parser.add_argument("-g", "--games", type=int, default=10, help="games per pairing and color")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--board", default="3,3,3", help="rows,columns,k")
+    parser.add_argument("--openings", type=int, default=0, help="random moves at the start of each game")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    if(len(args.engines) < 2):
+        sys.exit("At least two engines are needed")
+    try:
+        size = tuple(int(n) for n in args.board.split(","))
+        if(len(size) != 3):
+            raise ValueError(f"invalid board {args.board!r}")
+        report = tournament(args.engines, args.games, size, args.openings, args.workers, args.seed)
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+
+    print(f"{'engine':<16} {'W':>6} {'D':>6} {'L':>6} {'ms/move':>9} {'nodes/s':>11}")
+    for spec, entry in report.items():
+        print(f"{spec:<16} {entry['wins']:>6} {entry['draws']:>6} {entry['losses']:>6} "
+              f"{entry['mean_latency'] * 1000:>9.2f} {entry['nodes_per_second']:>11.0f}")
+    if(args.json):
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()